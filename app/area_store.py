@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS district_area (
+    key TEXT PRIMARY KEY,
+    area_km2 REAL NOT NULL,
+    negative INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    expires_at REAL
+)
+"""
+
+UPSERT = """
+INSERT INTO district_area (key, area_km2, negative, updated_at, expires_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    area_km2 = excluded.area_km2,
+    negative = excluded.negative,
+    updated_at = excluded.updated_at,
+    expires_at = excluded.expires_at
+"""
+
+# A negative entry only replaces another negative one, never a known area
+UPSERT_NEGATIVE = """
+INSERT INTO district_area (key, area_km2, negative, updated_at, expires_at)
+VALUES (?, 0.0, 1, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    updated_at = excluded.updated_at,
+    expires_at = excluded.expires_at
+WHERE district_area.negative = 1
+"""
+
+
+class AreaStore:
+    """District area cache in SQLite (WAL mode), shared by every uvicorn worker.
+
+    Each write is a single-row upsert, so workers never clobber each other's
+    entries and a crash cannot corrupt the rest of the cache. Failed lookups
+    are stored as negative entries (area 0.0) that expire and are then
+    retried: after `negative_ttl` seconds for districts whose boundaries have
+    no district-level polygons, or after the shorter TTL the caller passes
+    for upstream errors. A negative entry never overwrites a known positive
+    area.
+    """
+
+    def __init__(self, path, negative_ttl=86400.0, seed_json=None):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+        if seed_json and os.path.exists(seed_json):
+            self._seed_from_json(seed_json)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _seed_from_json(self, seed_json):
+        """Import the legacy District_Area.json once, when the table is still empty."""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM district_area LIMIT 1").fetchone():
+            return
+        with open(seed_json) as f:
+            legacy = json.load(f)
+        now = time.time()
+        rows = []
+        for key, area in legacy.items():
+            area = float(area)
+            if area > 0:
+                rows.append((key, area, 0, now, None))
+            else:
+                # 0.0 meant "lookup failed" in the JSON cache; retry it eventually
+                rows.append((key, 0.0, 1, now, now + self.negative_ttl))
+        with conn:
+            conn.executemany(UPSERT, rows)
+
+    def get(self, key):
+        """Cached area in km² (0.0 for a live negative entry), or None on a miss."""
+        row = self._connect().execute(
+            "SELECT area_km2, expires_at FROM district_area WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        area, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return area
+
+    def put(self, key, area_km2):
+        with self._connect() as conn:
+            conn.execute(UPSERT, (key, float(area_km2), 0, time.time(), None))
+
+    def put_many(self, items):
+        """Upsert many (key, area_km2) pairs in one transaction."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(UPSERT, [(k, float(a), 0, now, None) for k, a in items])
+
+    def put_negative(self, key, ttl=None):
+        """Record a failed lookup for `ttl` seconds (default `negative_ttl`), unless a positive area is stored."""
+        now = time.time()
+        ttl = self.negative_ttl if ttl is None else ttl
+        with self._connect() as conn:
+            conn.execute(UPSERT_NEGATIVE, (key, now, now + ttl))
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM district_area").fetchone()[0]
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded LRU cache with a freshness TTL, a stale window and request coalescing.
+
+    Entries younger than `ttl` are served as "fresh". Entries within the extra
+    `stale_ttl` window are served as "stale" while a single background refresh
+    runs. Anything older (or missing) is awaited, and concurrent misses on
+    the same key share one loader call.
+    """
+
+    def __init__(self, ttl, maxsize, stale_ttl=0.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._flights = {}  # key -> loading task
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get_or_load(self, key, loader):
+        """Return (value, status) where status is "fresh", "stale" or "miss".
+
+        `loader` is a coroutine function. Coalescing happens on the event
+        loop: concurrent misses await the same task, and stale entries
+        trigger one background refresh task.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self.clock() - entry[0]
+                if age <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1], "fresh"
+                if age <= self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if self._flight(key) is None:
+                        task = self._flights[key] = asyncio.ensure_future(
+                            self._load(key, loader)
+                        )
+                        # Nobody awaits a background refresh; keep its failure quiet
+                        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    return entry[1], "stale"
+
+            task = self._flight(key)
+            if task is None:
+                task = self._flights[key] = asyncio.ensure_future(
+                    self._load(key, loader)
+                )
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        # shield: one cancelled caller must not cancel the load for the others
+        return await asyncio.shield(task), "miss"
+
+    def _flight(self, key):
+        task = self._flights.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            # Left behind by an event loop that has since gone away
+            return None
+        return task
+
+    def get(self, key):
+        """Return the value if it is still fresh, else None (no loading, no stats)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self.clock() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value):
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _load(self, key, loader):
+        try:
+            value = await loader()
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        else:
+            with self._lock:
+                self._store(key, value)
+            return value
+        finally:
+            if self._flights.get(key) is asyncio.current_task():
+                del self._flights[key]
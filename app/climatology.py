@@ -0,0 +1,61 @@
+import re
+
+import numpy as np
+
+CLIMATOLOGY_COLUMNS = ["state_ut", "district", "week_of_outbreak", "preci", "Temp"]
+CLIMATE_FIELDS = ("preci", "Temp")
+
+
+def _week_number(label):
+    """"22nd week" -> 22 (None for labels without a leading number)."""
+    match = re.match(r"\s*(\d+)", str(label))
+    return int(match.group(1)) if match else None
+
+
+def _means(keys, values):
+    """Mean of each value column per distinct key tuple."""
+    sums = {}
+    for key, row in zip(keys, values):
+        total = sums.get(key)
+        if total is None:
+            sums[key] = [row.copy(), 1]
+        else:
+            total[0] += row
+            total[1] += 1
+    return {key: tuple(float(v) for v in total / count) for key, (total, count) in sums.items()}
+
+
+def build_climatology(climate_data, label_encoders):
+    """Seasonal means of the climate features from the processed training data.
+
+    Returns a dict of (preci, Temp) tuples in training units, keyed by ISO
+    week number at three levels, narrowest first:
+      - "district": (state, district, week), canonical encoder labels
+      - "state": (state, week)
+      - "national": week
+    Most districts only have a few outbreak weeks on record, so lookups
+    fall back to the wider levels.
+    """
+    state_names = label_encoders["state_ut"].classes_
+    district_names = label_encoders["district"].classes_
+    week_numbers = [_week_number(w) for w in label_encoders["week_of_outbreak"].classes_]
+
+    states = [str(state_names[c]) for c in climate_data["state_ut"]]
+    districts = [str(district_names[c]) for c in climate_data["district"]]
+    weeks = [week_numbers[c] for c in climate_data["week_of_outbreak"]]
+    values = np.column_stack([np.asarray(climate_data[f], dtype=np.float64) for f in CLIMATE_FIELDS])
+
+    return {
+        "district": _means(zip(states, districts, weeks), values),
+        "state": _means(zip(states, weeks), values),
+        "national": _means(((w,) for w in weeks), values),
+    }
+
+
+def climate_normals(climatology, state, district, week):
+    """({"preci": ..., "Temp": ...}, level) for a week, or (None, None) when no level has it."""
+    for level, key in (("district", (state, district, week)), ("state", (state, week)), ("national", (week,))):
+        values = climatology[level].get(key)
+        if values is not None:
+            return dict(zip(CLIMATE_FIELDS, values)), level
+    return None, None
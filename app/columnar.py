@@ -0,0 +1,125 @@
+"""Columnar, memory-mappable copy of processed_data.csv.
+
+The artifact is a directory holding one `.npy` file per column plus a
+`_schema.json` with the column order and row count. Every column is a
+contiguous typed array, so readers can `np.load(..., mmap_mode="r")`
+only the columns they need. Workers then share the OS page cache instead
+of each re-parsing the CSV.
+
+pandas is imported inside the readers, so importing this module (as the
+API does at startup) does not pull it in before data is actually loaded.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+COLUMNAR_FORMAT = 1
+SCHEMA_FILE = "_schema.json"
+
+
+class ColumnarWriter:
+    """Writes columns into preallocated `.npy` memmaps, one slice at a time.
+
+    Lets the chunked preprocessing pass stream rows straight to disk. The
+    directory is built next to `path` and swapped in by `close()`, so readers
+    never see a half-written artifact. `metadata` is stored in the schema
+    alongside the column list (e.g. which increments were appended).
+    """
+
+    def __init__(self, path, dtypes, rows, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.tmp_path = path + ".tmp"
+        self.columns = list(dtypes)
+        self.rows = rows
+        self.offset = 0
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        self._arrays = {
+            col: np.lib.format.open_memmap(
+                os.path.join(self.tmp_path, f"{col}.npy"), mode="w+",
+                dtype=np.dtype(dtype), shape=(rows,),
+            )
+            for col, dtype in dtypes.items()
+        }
+
+    def write(self, df):
+        end = self.offset + len(df)
+        for col in self.columns:
+            self._arrays[col][self.offset:end] = df[col].to_numpy()
+        self.offset = end
+
+    def close(self):
+        if self.offset != self.rows:
+            raise ValueError(f"Wrote {self.offset} rows, expected {self.rows}")
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays.clear()
+        with open(os.path.join(self.tmp_path, SCHEMA_FILE), "w") as f:
+            json.dump({**self.metadata, "format_version": COLUMNAR_FORMAT, "columns": self.columns,
+                       "rows": self.rows}, f)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp_path, self.path)
+
+
+def write_columns(df, path):
+    """Write a whole DataFrame in its current dtypes."""
+    writer = ColumnarWriter(path, df.dtypes.to_dict(), len(df))
+    writer.write(df)
+    writer.close()
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    if schema.get("format_version") != COLUMNAR_FORMAT:
+        raise ValueError(f"Unsupported columnar format: {schema.get('format_version')}")
+    return schema
+
+
+def read_columns(path, columns=None, mmap=True):
+    """Load the artifact (or a subset of columns) as a DataFrame.
+
+    With `mmap=True` the columns stay read-only views of the files on disk.
+    """
+    import pandas as pd
+
+    schema = read_schema(path)
+    columns = schema["columns"] if columns is None else list(columns)
+    mode = "r" if mmap else None
+    data = {col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode=mode) for col in columns}
+    return pd.DataFrame(data, copy=False)
+
+
+def is_current(path, source_path):
+    """True when the artifact exists and is not older than the CSV it mirrors."""
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        return False
+    return not os.path.exists(source_path) or os.path.getmtime(schema_path) >= os.path.getmtime(source_path)
+
+
+def load_processed_data(csv_path, columnar_path, columns=None, mmap=True):
+    """Prefer the columnar artifact; fall back to parsing the CSV if it is missing or stale."""
+    import pandas as pd
+
+    if is_current(columnar_path, csv_path):
+        return read_columns(columnar_path, columns, mmap=mmap)
+    if os.path.exists(os.path.join(columnar_path, SCHEMA_FILE)):
+        print(f"⚠️ {columnar_path} is older than {csv_path}; reading the CSV instead")
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+if __name__ == "__main__":
+    # Convert an existing CSV without re-running preprocessing:
+    #   python -m app.columnar data/processed_data.csv data/processed_columns
+    import sys
+
+    import pandas as pd
+
+    source, target = sys.argv[1], sys.argv[2]
+    frame = pd.read_csv(source)
+    write_columns(frame, target)
+    print(f"✅ Wrote {len(frame)} rows x {frame.shape[1]} columns to {target}")
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import shap
+except ImportError:
+    shap = None
+
+# CatBoost SHAP mode: Regular (exact for the model) or Approximate (~10x faster)
+EXPLAIN_SHAP_CALC_TYPE = os.getenv("EXPLAIN_SHAP_CALC_TYPE", "Regular")
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class ForestPathAttribution:
+    """Decision-path attributions for a sklearn RandomForestClassifier.
+
+    Each split moves the class-1 fraction from the parent node's value to
+    the child's; that change is credited to the parent's split feature and
+    averaged over the trees. Contributions plus the mean root value add up
+    to `predict_proba` exactly. All trees are evaluated with one
+    `decision_path` call and one sparse product.
+    """
+
+    def __init__(self, forest, n_features):
+        blocks = []
+        roots = []
+        for est in forest.estimators_:
+            tree = est.tree_
+            value = tree.value[:, 0, :]
+            p1 = value[:, 1] / value.sum(axis=1)
+            roots.append(p1[0])
+
+            children = np.concatenate([tree.children_left, tree.children_right])
+            parents = np.concatenate([np.arange(tree.node_count)] * 2)
+            keep = children != -1
+            children, parents = children[keep], parents[keep]
+            blocks.append(sp.csr_matrix(
+                (p1[children] - p1[parents], (children, tree.feature[parents])),
+                shape=(tree.node_count, n_features),
+            ))
+        self.forest = forest
+        self.deltas = sp.vstack(blocks).tocsr() / len(blocks)
+        self.expected_value = float(np.mean(roots))
+
+    def contributions(self, X):
+        if hasattr(self.forest, "feature_names_in_"):
+            # Fitted on a DataFrame: pass names so sklearn doesn't warn on every call
+            X = pd.DataFrame(X, columns=self.forest.feature_names_in_, copy=False)
+        indicator, _ = self.forest.decision_path(X)
+        return np.asarray((indicator @ self.deltas).todense()), self.expected_value
+
+
+class ForestTreeShap:
+    """Exact TreeSHAP for the forest via the optional `shap` package."""
+
+    def __init__(self, forest):
+        self.explainer = shap.TreeExplainer(forest)
+        expected = np.atleast_1d(self.explainer.expected_value)
+        self.expected_value = float(expected[-1])
+
+    def contributions(self, X):
+        values = self.explainer.shap_values(X, check_additivity=False)
+        if isinstance(values, list):
+            values = values[1]
+        elif values.ndim == 3:
+            values = values[:, :, 1]
+        return np.asarray(values), self.expected_value
+
+
+class ModelExplainer:
+    """Per-feature attributions for the outbreak ensemble and the two regressors.
+
+    - CatBoost: native `ShapValues` (log-odds), rescaled to probability so
+      they can be mixed with the forest's share of the soft vote.
+    - RandomForest: TreeSHAP when `shap` is installed, else decision-path
+      attributions (both additive in probability space).
+    - XGBoost regressors: native `pred_contribs`, in each model's output
+      space (log1p cases for the cases model).
+
+    Every row's contributions sum to its prediction minus the base value.
+    All methods take the assembled feature matrix and run once per batch.
+    """
+
+    def __init__(self, ensemble, cases_model, deaths_model, feature_order):
+        self.feature_order = [str(f) for f in feature_order]
+        self.catboost = ensemble.named_estimators_["catboost"]
+        forest = ensemble.named_estimators_["random_forest"]
+        weights = np.ones(2) if ensemble.weights is None else np.asarray(ensemble.weights, dtype=float)
+        self.weights = weights / weights.sum()
+        if shap is not None:
+            self.forest = ForestTreeShap(forest)
+        else:
+            self.forest = ForestPathAttribution(forest, len(self.feature_order))
+        self.cases_model = cases_model
+        self.deaths_model = deaths_model
+
+    def _catboost_probability(self, X):
+        from catboost import Pool
+
+        shap_values = self.catboost.get_feature_importance(
+            Pool(X), type="ShapValues", shap_calc_type=EXPLAIN_SHAP_CALC_TYPE, verbose=False
+        )
+        phi, base = shap_values[:, :-1], shap_values[:, -1]
+        raw = base + phi.sum(axis=1)
+        p, p_base = _sigmoid(raw), _sigmoid(base)
+        # Scale log-odds shares onto the probability change; the slope at the base when raw == base
+        delta = raw - base
+        slope = np.where(np.abs(delta) > 1e-9, (p - p_base) / np.where(delta == 0, 1, delta), p_base * (1 - p_base))
+        return phi * slope[:, None], p_base
+
+    def outbreak(self, X):
+        """(contributions, base values) for the ensemble's outbreak probability."""
+        cb_phi, cb_base = self._catboost_probability(X)
+        rf_phi, rf_base = self.forest.contributions(X)
+        w_cb, w_rf = self.weights
+        return w_cb * cb_phi + w_rf * rf_phi, w_cb * cb_base + w_rf * rf_base
+
+    @staticmethod
+    def _regressor(model, X):
+        import xgboost as xgb
+
+        booster = model.get_booster()
+        contribs = booster.predict(xgb.DMatrix(X, feature_names=booster.feature_names), pred_contribs=True)
+        return contribs[:, :-1], contribs[:, -1]
+
+    def explain(self, X):
+        """Per-row dicts of (contributions, base) for outbreak, cases and deaths."""
+        X = np.asarray(X, dtype=np.float32)
+        outbreak, outbreak_base = self.outbreak(X)
+        cases, cases_base = self._regressor(self.cases_model, X)
+        deaths, deaths_base = self._regressor(self.deaths_model, X)
+        return [
+            {
+                "outbreak": (outbreak[i], float(outbreak_base[i])),
+                "cases": (cases[i], float(cases_base[i])),
+                "deaths": (deaths[i], float(deaths_base[i])),
+            }
+            for i in range(len(X))
+        ]
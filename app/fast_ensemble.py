@@ -0,0 +1,102 @@
+import numpy as np
+
+FAST_ENSEMBLE_FORMAT = 1
+
+
+class FastEnsemble:
+    """NumPy evaluator for the exported CatBoost + RandomForest soft-voting ensemble.
+
+    Reads the flattened tree arrays written by `src/ensemble_export.py` and
+    reproduces `VotingClassifier.predict_proba` without sklearn/CatBoost
+    validation overhead. Inputs are raw feature arrays in `feature_names` order
+    (a DataFrame in that column order works too).
+    """
+
+    def __init__(self, arrays):
+        if int(arrays["format_version"]) != FAST_ENSEMBLE_FORMAT:
+            raise ValueError(f"Unsupported fast ensemble format: {arrays['format_version']}")
+        self.feature_names = [str(f) for f in arrays["feature_names"]]
+        self.classes_ = np.array([0, 1])
+        self.weights = arrays["weights"]
+
+        # CatBoost oblivious trees: one (feature, border) per level, shared by the whole level
+        self.cb_features = arrays["cb_features"]
+        self.cb_borders = arrays["cb_borders"]
+        self.cb_leaves = arrays["cb_leaves"]
+        self.cb_scale = float(arrays["cb_scale"])
+        self.cb_bias = float(arrays["cb_bias"])
+        self.cb_bit_weights = 1 << np.arange(self.cb_features.shape[1])
+
+        # RandomForest trees padded to the same node count; leaves point to themselves.
+        # Flattened with global node ids so traversal is 1-D gathers; a node's
+        # children sit side by side at 2*node (left) and 2*node + 1 (right).
+        n_trees, n_nodes = arrays["rf_left"].shape
+        offsets = (np.arange(n_trees) * n_nodes)[:, None]
+        self.rf_roots = offsets.ravel().astype(np.intp)
+        self.rf_children = np.stack(
+            [(arrays["rf_left"] + offsets).ravel(), (arrays["rf_right"] + offsets).ravel()], axis=1
+        ).ravel().astype(np.intp)
+        self.rf_feature = arrays["rf_feature"].ravel().astype(np.intp)
+        self.rf_threshold = arrays["rf_threshold"].ravel()
+        self.rf_value = arrays["rf_value"].ravel()
+        self.rf_depth = int(arrays["rf_depth"])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def _catboost_proba(self, X):
+        bits = X[:, self.cb_features] > self.cb_borders  # (rows, trees, depth)
+        leaf_idx = bits @ self.cb_bit_weights
+        raw = self.cb_leaves[np.arange(len(self.cb_leaves)), leaf_idx].sum(axis=1)
+        raw = raw * self.cb_scale + self.cb_bias
+        return 1.0 / (1.0 + np.exp(-raw))
+
+    def _forest_proba(self, X):
+        # Level-synchronous over (trees x rows); X is read feature-major so
+        # each gather stays within one feature's column
+        n_rows = X.shape[0]
+        flat_X = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n_rows, dtype=np.intp)
+        node = np.repeat(self.rf_roots[:, None], n_rows, axis=1)
+        for _ in range(self.rf_depth):
+            go_right = flat_X[self.rf_feature[node] * n_rows + rows] > self.rf_threshold[node]
+            node = self.rf_children[2 * node + go_right]
+        return self.rf_value[node].mean(axis=0)
+
+    def predict_proba(self, X):
+        # Both CatBoost and sklearn trees compare float32 features
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        p1 = self.weights[0] * self._catboost_proba(X) + self.weights[1] * self._forest_proba(X)
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X, threshold=0.5):
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(int)
+
+
+class BatchDispatchModel:
+    """Serves small batches from the fast ensemble and large ones from the pickle.
+
+    The NumPy traversal pays per gathered node, while sklearn/CatBoost walk
+    trees in compiled loops behind a fixed per-call overhead, so the pickle
+    wins past a few hundred rows (see benchmarks/bench_fast_ensemble.py).
+    `load_large` is called on the first batch over `max_rows`.
+    """
+
+    def __init__(self, fast, load_large, max_rows):
+        self.fast = fast
+        self.load_large = load_large
+        self.max_rows = max_rows
+        self.feature_names = fast.feature_names
+        self.classes_ = fast.classes_
+
+    def predict_proba(self, X):
+        if self.max_rows and len(X) > self.max_rows:
+            return self.load_large().predict_proba(X)
+        return self.fast.predict_proba(X)
+
+    def predict(self, X, threshold=0.5):
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(int)
@@ -0,0 +1,133 @@
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from app.label_resolver import FUZZY_CACHE_SIZE
+
+# Live input fields that stand in for a differently named training column
+FIELD_ALIASES = {"temperature": "Temp", "precip": "preci"}
+# weatherstack reports °C; the training data's Temp is in Kelvin.
+# precip has no conversion: the training data does not record preci's unit.
+FIELD_CONVERSIONS = {"temperature": lambda celsius: celsius + 273.15}
+ENCODED_FIELDS = ("state_ut", "district", "Disease", "week_of_outbreak")
+
+
+def week_label(week):
+    """ISO week number -> the training data's label ("1st week", "22nd week", ...)."""
+    week = int(week)
+    suffix = "th" if 10 <= week % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(week % 10, "th")
+    return f"{week}{suffix} week"
+
+
+class FeatureAssembler:
+    """Builds model input matrices straight from input row dicts.
+
+    Compiled once from `feature_order` and the label resolvers: every input
+    field (including aliases such as temperature -> Temp) maps to a column
+    index, and categorical label codes are memoized in a bounded LRU of
+    recent distinct values. `assemble` fills one preallocated float32 array,
+    column by column, so no DataFrame is built per request. Fields the
+    models do not use are ignored; feature columns with no input field stay 0.
+    """
+
+    def __init__(self, feature_order, resolvers):
+        self.feature_order = [str(f) for f in feature_order]
+        self.index = {name: i for i, name in enumerate(self.feature_order)}
+        self.resolvers = {col: resolvers[col] for col in ENCODED_FIELDS if col in self.index and col in resolvers}
+        self.aliases = {
+            alias: target for alias, target in FIELD_ALIASES.items()
+            if target in self.index and alias not in self.index
+        }
+        # Bounded like the resolvers' fuzzy cache: raw labels come straight from requests
+        self.encode = lru_cache(maxsize=FUZZY_CACHE_SIZE)(self._encode)
+        self._plans = {}
+
+    def plan(self, fields):
+        """(field, column index, encoded, conversion) for the fields a row provides."""
+        key = tuple(fields)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = []
+            for field in key:
+                if field in self.index:
+                    plan.append((field, self.index[field], field in self.resolvers, None))
+                elif field in self.aliases and self.aliases[field] not in key:
+                    # The canonical field wins when a row carries both
+                    plan.append((field, self.index[self.aliases[field]], False, FIELD_CONVERSIONS.get(field)))
+            self._plans[key] = plan
+        return plan
+
+    def _encode(self, column, value):
+        """Integer code for a categorical value; `encode` memoizes it per recent distinct value."""
+        resolver = self.resolvers[column]
+        label = week_label(value) if column == "week_of_outbreak" and not isinstance(value, str) else value
+        label = str(label).strip()
+        match = resolver.match(label)
+        if match is None:
+            print(f"⚠️ Unknown label: {label}")
+            match = resolver.classes[0]  # fallback to first known label
+        elif match != label:
+            print(f"⚠️ Using closest match for '{label}': '{match}'")
+        return resolver.codes[match]
+
+    def label(self, column, value):
+        """Class label behind an encoded feature value (None for numeric columns)."""
+        resolver = self.resolvers.get(column)
+        return None if resolver is None else resolver.classes[int(value)]
+
+    def assemble(self, rows, out=None):
+        """Feature matrix (rows x features, float32) in `feature_order` column order."""
+        n = len(rows)
+        X = out[:n] if out is not None else np.empty((n, len(self.feature_order)), dtype=np.float32)
+        X.fill(0)
+        if not n:
+            return X
+
+        # Rows normally share one field set; mixed ones are filled group by group
+        groups = {}
+        for r, row in enumerate(rows):
+            groups.setdefault(tuple(row), []).append(r)
+        if len(groups) == 1:
+            self._fill(X, slice(None), rows, self.plan(next(iter(groups))))
+        else:
+            for fields, idx in groups.items():
+                self._fill(X, idx, [rows[r] for r in idx], self.plan(fields))
+        return X
+
+    def _fill(self, X, target, rows, plan):
+        for field, col, encoded, convert in plan:
+            values = [row[field] for row in rows]
+            if encoded:
+                values = [self.encode(field, v) for v in values]
+            elif convert is not None:
+                values = [None if v is None else convert(v) for v in values]
+            X[target, col] = values
+
+        week = self.index.get("week_of_outbreak")
+        if week is not None and not any(col == week for _, col, _, _ in plan):
+            X[target, week] = self.encode("week_of_outbreak", datetime.now().isocalendar()[1])
+
+
+class NamedFeatureModel:
+    """Wraps an estimator fitted on a DataFrame so it accepts assembled arrays.
+
+    sklearn warns on every call when a model fitted with feature names gets a
+    bare array; only the pickled ensemble fallback needs this.
+    """
+
+    def __init__(self, model, feature_order):
+        self.model = model
+        self.feature_order = [str(f) for f in feature_order]
+        self.classes_ = getattr(model, "classes_", None)
+
+    def _frame(self, X):
+        import pandas as pd
+
+        return pd.DataFrame(X, columns=self.feature_order, copy=False)
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self._frame(X))
+
+    def predict(self, X):
+        return self.model.predict(self._frame(X))
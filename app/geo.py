@@ -0,0 +1,116 @@
+import numpy as np
+
+# Geoapify admin levels that correspond to Indian districts
+DISTRICT_ADMIN_LEVELS = (5, 6)
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_E = np.sqrt(WGS84_E2)
+
+
+def district_geometries(features):
+    """Polygon/MultiPolygon geometries of the district-level boundary features."""
+    geometries = []
+    for feature in features:
+        props = feature.get("properties", {})
+        geometry = feature.get("geometry", {})
+        admin_level = (
+            props.get("admin_level")
+            or props.get("datasource", {}).get("raw", {}).get("admin_level")
+        )
+        if admin_level not in DISTRICT_ADMIN_LEVELS:
+            continue
+        if geometry.get("type") not in ["Polygon", "MultiPolygon"]:
+            continue
+        geometries.append(geometry)
+    return geometries
+
+
+def geod_area_km2(geometries):
+    """Total area in km² of GeoJSON geometries (one district's worth).
+
+    Same computation as the bulk precompute job, so a live lookup and a
+    precomputed store entry always agree.
+    """
+    return float(geodesic_areas_km2([geometries])[0])
+
+
+def geometry_rings(geometry):
+    """Yield (ring_coordinates, is_hole) for a GeoJSON Polygon or MultiPolygon."""
+    polygons = geometry["coordinates"]
+    if geometry["type"] == "Polygon":
+        polygons = [polygons]
+    for polygon in polygons:
+        for i, ring in enumerate(polygon):
+            yield ring, i > 0
+
+
+def _authalic_latitude(lat_rad):
+    """Map geodetic to authalic latitude so sphere areas match the ellipsoid."""
+    def q(sin_phi):
+        return (1 - WGS84_E2) * (
+            sin_phi / (1 - WGS84_E2 * sin_phi ** 2)
+            - np.log((1 - WGS84_E * sin_phi) / (1 + WGS84_E * sin_phi)) / (2 * WGS84_E)
+        )
+
+    qp = q(1.0)
+    return np.arcsin(np.clip(q(np.sin(lat_rad)) / qp, -1.0, 1.0)), WGS84_A * np.sqrt(qp / 2)
+
+
+def geodesic_areas_km2(groups):
+    """Area in km² for each group of GeoJSON geometries, computed in one NumPy pass.
+
+    `groups` is a list (one entry per district) of lists of geometries. Every
+    ring of every group is concatenated into flat coordinate arrays, the
+    per-edge spherical excess is evaluated on the WGS84 authalic sphere, and
+    results are reduced back per ring and per group. Ring orientation is
+    normalized by taking each ring's area unsigned, then holes are
+    subtracted, so mis-wound shells or holes (common in Geoapify and OSM
+    data) give the same area as correctly wound ones.
+    """
+    coords = []
+    ring_starts = []
+    ring_signs = []
+    ring_groups = []
+    offset = 0
+    for group_idx, geometries in enumerate(groups):
+        for geometry in geometries:
+            for ring, is_hole in geometry_rings(geometry):
+                ring = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(ring) < 3:
+                    continue
+                if not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack([ring, ring[:1]])
+                coords.append(ring)
+                ring_starts.append(offset)
+                ring_signs.append(-1.0 if is_hole else 1.0)
+                ring_groups.append(group_idx)
+                offset += len(ring)
+
+    areas = np.zeros(len(groups))
+    if not coords:
+        return areas
+
+    points = np.radians(np.concatenate(coords))
+    lon = points[:, 0]
+    beta, radius = _authalic_latitude(points[:, 1])
+
+    # Edges run from each vertex to the next; the last vertex of a ring closes it,
+    # so its "edge" into the following ring is masked out.
+    last = np.zeros(len(points), dtype=bool)
+    ring_ends = np.append(np.asarray(ring_starts[1:], dtype=np.intp), len(points)) - 1
+    last[ring_ends] = True
+
+    dlon = np.roll(lon, -1) - lon
+    dlon = (dlon + np.pi) % (2 * np.pi) - np.pi
+    t1 = np.tan(beta / 2)
+    t2 = np.roll(t1, -1)
+    excess = 2 * np.arctan2(np.tan(dlon / 2) * (t1 + t2), 1 + t1 * t2)
+    excess[last] = 0.0
+
+    # Unsigned per ring: orientation decides nothing, the hole flag does
+    ring_area_m2 = np.abs(np.add.reduceat(excess, ring_starts)) * radius ** 2
+    np.add.at(areas, ring_groups, np.asarray(ring_signs) * ring_area_m2 / 1e6)
+    return areas
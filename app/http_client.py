@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.metrics import metrics
+
+# Shared connection pool for the upstream APIs (weatherstack, Geoapify)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 32))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 16))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", 8))
+
+_client = None
+_client_loop = None
+_host_limits = {}
+_closing = set()
+
+
+async def _close_quietly(client):
+    try:
+        await client.aclose()
+    except Exception as e:
+        # Its loop is gone; the sockets are released even if the close itself errors
+        print(f"⚠️ Closing a client from a previous event loop: {e}")
+
+
+def _retire_client(client, loop):
+    """Close a client that belongs to another event loop so its pooled connections are released."""
+    if loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(_close_quietly(client), loop)
+    else:
+        task = asyncio.ensure_future(_close_quietly(client))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+def get_client():
+    """Return the pooled async client for the running event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        # Connections and semaphores are bound to a loop; start fresh on a new one
+        if _client is not None:
+            _retire_client(_client, _client_loop)
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _client_loop = loop
+        _host_limits.clear()
+    return _client
+
+
+async def get_json(url, params=None, timeout=10.0):
+    """GET a JSON document, capping in-flight requests per upstream host.
+
+    Raises `httpx.HTTPStatusError` on a non-2xx response.
+    """
+    client = get_client()
+    host = httpx.URL(url).host
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    async with limit:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            res = await client.get(url, params=params, timeout=timeout)
+            outcome = f"{res.status_code // 100}xx"
+        finally:
+            metrics.observe("upstream_request_duration_seconds", time.perf_counter() - started, host=host)
+            metrics.inc("upstream_requests_total", host=host, outcome=outcome)
+    # Error bodies (401, 429, 5xx) must not be mistaken for an empty answer
+    res.raise_for_status()
+    return res.json()
+
+
+async def close_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_limits.clear()
@@ -0,0 +1,37 @@
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+
+class StableLabelEncoder(LabelEncoder):
+    """LabelEncoder that can learn new labels without renumbering existing ones.
+
+    `extend` appends unseen labels after the current classes, so every code
+    already stored in processed data, models and caches keeps its meaning.
+    `classes_` is therefore only sorted up to the first extension, and
+    `transform` uses a dict lookup instead of LabelEncoder's binary search.
+    Lives in app/ so the API can unpickle encoders saved by src/ scripts.
+    """
+
+    @classmethod
+    def from_encoder(cls, encoder):
+        stable = cls()
+        stable.classes_ = np.asarray(encoder.classes_, dtype=object)
+        return stable
+
+    def extend(self, labels):
+        """Append labels not seen before; returns the newly added ones."""
+        known = set(self.classes_.tolist())
+        new = sorted({label for label in labels if label not in known})
+        if new:
+            self.classes_ = np.concatenate([self.classes_, np.array(new, dtype=object)])
+        return new
+
+    def transform(self, y):
+        codes = {label: code for code, label in enumerate(self.classes_)}
+        try:
+            return np.array([codes[label] for label in y], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e.args[0]!r}") from None
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.int64)]
@@ -0,0 +1,66 @@
+from difflib import get_close_matches
+from functools import lru_cache
+
+from app.location_index import normalize_name
+
+# Same similarity cutoff the per-request difflib scans used
+FUZZY_CUTOFF = 0.8
+FUZZY_CACHE_SIZE = 4096
+
+
+def _trigrams(text):
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LabelResolver:
+    """Resolve free-text labels to encoder classes and integer codes.
+
+    Exact and normalized (case/whitespace-insensitive) matches are dict hits.
+    Fuzzy matching only compares against classes sharing a trigram with the
+    input and passing difflib's length bound, and its results are memoized.
+    """
+
+    def __init__(self, classes, cache_size=FUZZY_CACHE_SIZE):
+        self.classes = [str(c) for c in classes]
+        self.codes = {label: code for code, label in enumerate(self.classes)}
+
+        self.normalized = {}
+        for label in self.classes:
+            self.normalized.setdefault(normalize_name(label), label)
+
+        self.trigram_index = {}
+        for idx, label in enumerate(self.classes):
+            for gram in _trigrams(label):
+                self.trigram_index.setdefault(gram, []).append(idx)
+
+        self.fuzzy_match = lru_cache(maxsize=cache_size)(self._fuzzy_match)
+
+    def candidates(self, label):
+        """Classes that could reach the fuzzy cutoff against `label`."""
+        seen = set()
+        for gram in _trigrams(label):
+            seen.update(self.trigram_index.get(gram, ()))
+
+        n = len(label)
+        candidates = []
+        for idx in seen:
+            m = len(self.classes[idx])
+            # difflib's ratio is at most 2*min(n, m) / (n + m)
+            if 2.0 * min(n, m) / (n + m) >= FUZZY_CUTOFF:
+                candidates.append(self.classes[idx])
+        return candidates
+
+    def _fuzzy_match(self, label):
+        matches = get_close_matches(label, self.candidates(label), n=1, cutoff=FUZZY_CUTOFF)
+        return matches[0] if matches else None
+
+    def match(self, label):
+        """Return the known class closest to `label`, or None if nothing is close enough."""
+        label = label.strip()
+        if label in self.codes:
+            return label
+        normalized = self.normalized.get(normalize_name(label))
+        if normalized is not None:
+            return normalized
+        return self.fuzzy_match(label)
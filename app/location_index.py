@@ -0,0 +1,67 @@
+def normalize_name(name):
+    """Normalize a state/district name for case- and whitespace-insensitive lookups."""
+    return " ".join(str(name).lower().split())
+
+
+def _first_by_name(records, name_field, value_field, parse):
+    """Map normalized names to the first parseable value, like the old `next(...)` scans."""
+    values = {}
+    for item in records:
+        key = normalize_name(item.get(name_field, ""))
+        if key in values:
+            continue
+        try:
+            values[key] = parse(item[value_field])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return values
+
+
+def _parse_population(value):
+    return float(str(value).replace(",", ""))
+
+
+def build_location_index(location_data, label_encoders, lai_data, pop_data):
+    """Build the static location lookup tables once at startup.
+
+    Returns a dict with:
+      - "states": sorted list of known states
+      - "districts_by_state": state -> sorted list of districts
+      - "locations": canonical (state, district) labels -> static feature record
+      - "lai_by_district" / "population_by_district": normalized district -> value
+    """
+    state_names = label_encoders["state_ut"].classes_
+    district_names = label_encoders["district"].classes_
+
+    lai_by_district = _first_by_name(lai_data, "District_Name", "Mean_LAI", float)
+    population_by_district = _first_by_name(pop_data, "District", "Population", _parse_population)
+
+    # First row per (state, district) carries the coordinates, as get_lat_long used to return
+    pairs = location_data.drop_duplicates(subset=["state_ut", "district"], keep="first")
+
+    locations = {}
+    districts_by_state = {}
+    for state_code, district_code, lat, lon in zip(
+        pairs["state_ut"], pairs["district"], pairs["Latitude"], pairs["Longitude"]
+    ):
+        state = str(state_names[state_code])
+        district = str(district_names[district_code])
+        district_key = normalize_name(district)
+        # Keyed by the encoder labels: some districts differ only by case
+        locations[(state, district)] = {
+            "state_ut": state,
+            "district": district,
+            "Latitude": float(lat),
+            "Longitude": float(lon),
+            "LAI": lai_by_district.get(district_key, 0.0),
+            "Population": population_by_district.get(district_key, 0.0),
+        }
+        districts_by_state.setdefault(state, set()).add(district)
+
+    return {
+        "states": sorted(str(s) for s in state_names),
+        "districts_by_state": {s: sorted(d) for s, d in districts_by_state.items()},
+        "locations": locations,
+        "lai_by_district": lai_by_district,
+        "population_by_district": population_by_district,
+    }
@@ -1,15 +1,15 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import joblib
-import pandas as pd
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List
 import numpy as np
-from datetime import datetime
-import requests
+from datetime import datetime, timedelta
+import asyncio
 import json
 import os
-from shapely.geometry import shape, Polygon, MultiPolygon
-from pyproj import Geod
+import time
 from dotenv import load_dotenv
 load_dotenv()
 geoapify_secretkey = os.getenv("GEOAPIFY_API_KEY")
@@ -17,11 +17,25 @@ weather_secretkey = os.getenv("WEATHER_API_KEY")
 
 # --- Import helper functions from model_utils ---
 from app.model_utils import (
+    assemble_features,
     get_all_states,
+    get_climate_normals,
     get_districts_by_state,
-    prepare_input,
     get_lat_long,
+    get_static_features,
+    resolve_state,
+    outbreak_thresholds,
 )
+from app.area_store import AreaStore
+from app.cache import TTLCache
+from app.geo import district_geometries, geod_area_km2
+from app.http_client import close_client, get_json
+from app.location_index import normalize_name
+from app.metrics import MetricsMiddleware, metrics
+from app.model_registry import MODEL_LOAD_MODE, registry
+from app.prediction_cache import PredictionCache
+from app.responses import encoded_response
+from app.snapshot_store import SnapshotStore
 
 # --- Initialize API ---
 app = FastAPI(title="Disease Outbreak Predictor API")
@@ -32,98 +46,170 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
-# --- Load models and assets ---
-combined_model = joblib.load("models/combined_outbreak_model.pkl")
-cases_model = joblib.load("models/xgb_cases_model.pkl")
-deaths_model = joblib.load("models/xgb_deaths_model.pkl")
-label_encoders = joblib.load("models/label_encoders.pkl")
-feature_order = np.load("models/feature_order.npy", allow_pickle=True)
-
-with open("data/LAI.json") as f:
-    lai_data = json.load(f)
-with open("data/Population.json") as f:
-    pop_data = json.load(f)
+# --- Load models and assets (once per process, see app/model_registry.py) ---
+if MODEL_LOAD_MODE == "eager":
+    registry.load_all()
 
 # --- API Keys and Cache Setup ---
 GEOAPIFY_API_KEY = geoapify_secretkey
 WEATHER_API_KEY = weather_secretkey 
-AREA_CACHE_FILE = "data/District_Area.json"
-AREA_CACHE = {}
+# Upstream endpoints are overridable so local stub servers can stand in for them
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://api.weatherstack.com/current")
+GEOAPIFY_API_URL = os.getenv("GEOAPIFY_API_URL", "https://api.geoapify.com/v1/boundaries/part-of")
+AREA_CACHE_FILE = "data/District_Area.json"  # legacy cache, imported into the store once
+AREA_STORE_PATH = os.getenv("AREA_STORE_PATH", "data/district_area.sqlite3")
+AREA_NEGATIVE_TTL = float(os.getenv("AREA_NEGATIVE_TTL", 86400))
+# Geoapify errors and empty answers are retried sooner than a real "no polygons"
+AREA_ERROR_TTL = float(os.getenv("AREA_ERROR_TTL", 300))
+AREA_STORE = AreaStore(AREA_STORE_PATH, negative_ttl=AREA_NEGATIVE_TTL, seed_json=AREA_CACHE_FILE)
+
+# Weather is cached per (state, district); stale entries are served while one refresh runs
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 600))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", 3600))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", 1024))
+WEATHER_CACHE = TTLCache(
+    ttl=WEATHER_CACHE_TTL, maxsize=WEATHER_CACHE_SIZE, stale_ttl=WEATHER_CACHE_STALE_TTL
+)
 
-if os.path.exists(AREA_CACHE_FILE):
-    with open(AREA_CACHE_FILE, "r") as f:
-        AREA_CACHE = json.load(f)
-else:
-    AREA_CACHE = {}
+# Per-row prediction cache; set PREDICTION_CACHE_PATH to share results across workers
+PREDICTION_CACHE = PredictionCache(
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", 86400)),
+    maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", 20000)),
+    shared_path=os.getenv("PREDICTION_CACHE_PATH") or None,
+)
+
+# Feature attributions per prepared feature vector (same keys as the prediction cache)
+EXPLAIN_CACHE = TTLCache(
+    ttl=float(os.getenv("EXPLAIN_CACHE_TTL", 86400)),
+    maxsize=int(os.getenv("EXPLAIN_CACHE_SIZE", 5000)),
+)
+
+# Background snapshots of every district's predictions; SNAPSHOT_INTERVAL=0 disables the scheduler
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", 0))
+SNAPSHOT_STORE_PATH = os.getenv("SNAPSHOT_STORE_PATH", "data/snapshots.sqlite3")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", 3))
+SNAPSHOT_LEASE = float(os.getenv("SNAPSHOT_LEASE", 1800))
+SNAPSHOT_MAX_FALLBACK_RATIO = float(os.getenv("SNAPSHOT_MAX_FALLBACK_RATIO", 0.5))
+SNAPSHOT_BATCH = 100
+SNAPSHOT_STORE = SnapshotStore(SNAPSHOT_STORE_PATH, keep=SNAPSHOT_KEEP)
+
+# Existing cache counters are read at scrape time rather than mirrored
+def cache_metrics():
+    for cache, stats in (("weather", WEATHER_CACHE.stats), ("predictions", PREDICTION_CACHE.stats)):
+        for event, value in stats.items():
+            yield "cache_events_total", "counter", {"cache": cache, "event": event}, value
+    yield "cache_entries", "gauge", {"cache": "weather"}, len(WEATHER_CACHE)
+    yield "cache_entries", "gauge", {"cache": "predictions"}, len(PREDICTION_CACHE.memory)
+    yield "cache_entries", "gauge", {"cache": "explanations"}, len(EXPLAIN_CACHE)
+
+metrics.register_collector(cache_metrics)
+
+# --- Prediction Settings ---
+DISEASES = ["Dengue", "Chikungunya", "Cholera"]
+MAX_BATCH_LOCATIONS = 50
+MAX_OUTLOOK_WEEKS = 12
+# Fields that differ between a location's per-disease entries; the rest is shared context
+PER_DISEASE_FIELDS = ("Disease", "outbreak", "probability", "cases", "deaths")
+VIEW_PATTERN = "^(full|compact)$"
+SWEEP_CONCURRENCY = int(os.getenv("SWEEP_CONCURRENCY", 16))
 
 # --- Request Schema ---
 class LocationInput(BaseModel):
     state_ut: str
     district: str
 
+class BatchLocationInput(BaseModel):
+    locations: List[LocationInput]
+
+class OutlookInput(LocationInput):
+    weeks: int = Field(8, ge=1, le=MAX_OUTLOOK_WEEKS)
+    # Use seasonal means from the training data instead of today's weather
+    climatology: bool = False
+
 # --- Helper Functions ---
-def get_weather(state, district):
-    """Fetch comprehensive weather, air quality, and atmospheric data safely."""
-    try:
-        location = f"{district}, {state}"
-        url = f"http://api.weatherstack.com/current?access_key={WEATHER_API_KEY}&query={location}"
-        res = requests.get(url, timeout=10).json()
-        
-        if res.get("error"):
-            raise ValueError(f"Weather API error: {res['error']}")
+async def fetch_weather(state, district):
+    """Fetch comprehensive weather, air quality, and atmospheric data from weatherstack."""
+    location = f"{district}, {state}"
+    res = await get_json(
+        WEATHER_API_URL,
+        params={"access_key": WEATHER_API_KEY, "query": location},
+        timeout=10,
+    )
+    
+    if res.get("error"):
+        raise ValueError(f"Weather API error: {res['error']}")
+    
+    current = res.get("current", {})
+    air_quality = current.get("air_quality", {})
+    location_info = res.get("location", {})
+    
+    # Calculate simple AQI based on PM2.5, NO2, O3 (EPA-inspired index: 1=Good, 2=Moderate, etc.)
+    pm25 = float(air_quality.get("pm2_5", 0))
+    no2 = float(air_quality.get("no2", 0))
+    o3 = float(air_quality.get("o3", 0))
+    aqi = 1  # Default Good
+    if pm25 > 35.4 or no2 > 53 or o3 > 70:
+        aqi = 2  # Moderate
+    if pm25 > 55.4 or no2 > 100 or o3 > 137:
+        aqi = 3  # Unhealthy for sensitive groups
+    
+    # Consolidated weather data - selective important factors only
+    return {
+        # Core weather
+        "temperature": float(current.get("temperature", 0.0)),
+        "feelslike": float(current.get("feelslike", 0.0)),
+        "humidity": float(current.get("humidity", 0.0)),
+        "precip": float(current.get("precip", 0.0)),
+        "wind_speed": float(current.get("wind_speed", 0.0)),
+        "wind_dir": current.get("wind_dir", "N/A"),
+        "pressure": float(current.get("pressure", 0.0)),
+        "cloudcover": float(current.get("cloudcover", 0.0)),
+        "visibility": float(current.get("visibility", 10.0)),
         
-        current = res.get("current", {})
-        air_quality = current.get("air_quality", {})
-        location_info = res.get("location", {})
+        # Air quality (expanded but selective)
+        "pm2_5": pm25,
+        "pm10": float(air_quality.get("pm10", 0.0)),
+        "no2": no2,
+        "o3": o3,
+        "so2": float(air_quality.get("so2", 0.0)),
+        "co": float(air_quality.get("co", 0.0)),
+        "aqi": aqi,
+        "us_epa_index": air_quality.get("us-epa-index", 1),
+        "gb_defra_index": air_quality.get("gb-defra-index", 1),
         
-        # Calculate simple AQI based on PM2.5, NO2, O3 (EPA-inspired index: 1=Good, 2=Moderate, etc.)
-        pm25 = float(air_quality.get("pm2_5", 0))
-        no2 = float(air_quality.get("no2", 0))
-        o3 = float(air_quality.get("o3", 0))
-        aqi = 1  # Default Good
-        if pm25 > 35.4 or no2 > 53 or o3 > 70:
-            aqi = 2  # Moderate
-        if pm25 > 55.4 or no2 > 100 or o3 > 137:
-            aqi = 3  # Unhealthy for sensitive groups
+        # Location (updated from API if available, fallback to static)
+        "latitude": float(location_info.get("lat", 0.0)),
+        "longitude": float(location_info.get("lon", 0.0)),
+        "timezone": location_info.get("timezone_id", "Asia/Kolkata"),
+        "localtime": current.get("observation_time", "N/A"),
         
-        # Consolidated weather data - selective important factors only
-        return {
-            # Core weather
-            "temperature": float(current.get("temperature", 0.0)),
-            "feelslike": float(current.get("feelslike", 0.0)),
-            "humidity": float(current.get("humidity", 0.0)),
-            "precip": float(current.get("precip", 0.0)),
-            "wind_speed": float(current.get("wind_speed", 0.0)),
-            "wind_dir": current.get("wind_dir", "N/A"),
-            "pressure": float(current.get("pressure", 0.0)),
-            "cloudcover": float(current.get("cloudcover", 0.0)),
-            "visibility": float(current.get("visibility", 10.0)),
-            
-            # Air quality (expanded but selective)
-            "pm2_5": pm25,
-            "pm10": float(air_quality.get("pm10", 0.0)),
-            "no2": no2,
-            "o3": o3,
-            "so2": float(air_quality.get("so2", 0.0)),
-            "co": float(air_quality.get("co", 0.0)),
-            "aqi": aqi,
-            "us_epa_index": air_quality.get("us-epa-index", 1),
-            "gb_defra_index": air_quality.get("gb-defra-index", 1),
-            
-            # Location (updated from API if available, fallback to static)
-            "latitude": float(location_info.get("lat", 0.0)),
-            "longitude": float(location_info.get("lon", 0.0)),
-            "timezone": location_info.get("timezone_id", "Asia/Kolkata"),
-            "localtime": current.get("observation_time", "N/A"),
-            
-            # Weather description for UI (e.g., "Clear", "Partly Cloudy")
-            "weather_description": current.get("weather_descriptions", ["Clear"])[0] if current.get("weather_descriptions") else "Clear",
-            "is_day": current.get("is_day", "yes") == "yes",
-        }
+        # Weather description for UI (e.g., "Clear", "Partly Cloudy")
+        "weather_description": current.get("weather_descriptions", ["Clear"])[0] if current.get("weather_descriptions") else "Clear",
+        "is_day": current.get("is_day", "yes") == "yes",
+        "fetched_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+    }
+
+async def get_weather(state, district):
+    """Fetch weather through the TTL cache, falling back to safe defaults on failure.
+
+    The returned dict carries `stale` (served past its TTL while a refresh runs),
+    `fetched_at` (when the upstream data was retrieved) and `fallback` (the
+    upstream failed and the readings are placeholders, not measurements).
+    """
+    try:
+        with metrics.span("weather"):
+            weather, status = await WEATHER_CACHE.get_or_load(
+                (normalize_name(state), normalize_name(district)),
+                lambda: fetch_weather(state, district),
+            )
+        return {**weather, "stale": status == "stale", "fallback": False}
     except Exception as e:
         print(f"⚠️ Weather fetch failed for {district}, {state}: {e}")
+        metrics.inc("fallbacks_total", source="weather")
         # Fallback with sensible defaults (e.g., for Leh in winter)
         return {
             "temperature": 0.0,
@@ -150,83 +236,74 @@ def get_weather(state, district):
             "localtime": "N/A",
             "weather_description": "Clear",
             "is_day": True,
+            "stale": False,
+            "fetched_at": None,
+            # Placeholder readings: build_input_row scores seasonal normals instead
+            "fallback": True,
         }
 
-def get_district_area(state, district, lat, lon, force_refresh=False):
+async def get_district_area(state, district, lat, lon, force_refresh=False):
     """Fetch or compute district area using Geoapify (safe)."""
     key = f"{state}_{district}".lower()
-    if not force_refresh and key in AREA_CACHE:
-        return AREA_CACHE[key]
+    if not force_refresh:
+        # WAL reads are usually sub-millisecond, but wait on the busy timeout
+        # while another worker checkpoints; keep that off the event loop
+        cached = await run_in_threadpool(AREA_STORE.get, key)
+        if cached is not None:
+            metrics.inc("area_lookups_total", result="hit")
+            return cached
+    metrics.inc("area_lookups_total", result="refresh" if force_refresh else "miss")
 
     total_area_km2 = 0.0
     try:
-        url = (
-            f"https://api.geoapify.com/v1/boundaries/part-of?"
-            f"lat={lat}&lon={lon}&geometry=geometry_1000&apiKey={GEOAPIFY_API_KEY}"
-        )
-        res = requests.get(url, timeout=15).json()
+        with metrics.span("area_upstream"):
+            res = await get_json(
+                GEOAPIFY_API_URL,
+                params={"lat": lat, "lon": lon, "geometry": "geometry_1000", "apiKey": GEOAPIFY_API_KEY},
+                timeout=15,
+            )
         features = res.get("features", [])
         print(f"🌍 Geoapify returned {len(features)} features for {district}, {state}")
+        if not features:
+            print(f"⚠️ No boundary features returned for {district}, {state}")
+            metrics.inc("fallbacks_total", source="area")
+            await run_in_threadpool(AREA_STORE.put_negative, key, AREA_ERROR_TTL)
+            return 0.0
 
-        geod = Geod(ellps="WGS84")
-        for feature in features:
-            props = feature.get("properties", {})
-            geometry = feature.get("geometry", {})
-            admin_level = (
-                props.get("admin_level")
-                or props.get("datasource", {}).get("raw", {}).get("admin_level")
-            )
-            if admin_level not in [5, 6]:
-                continue
-
-            geom_type = geometry.get("type")
-            if geom_type not in ["Polygon", "MultiPolygon"]:
-                continue
-
-            geom = shape(geometry)
-            if isinstance(geom, MultiPolygon):
-                for poly in geom.geoms:
-                    area_m2 = abs(geod.geometry_area_perimeter(poly)[0])
-                    total_area_km2 += area_m2 / 1e6
-            elif isinstance(geom, Polygon):
-                area_m2 = abs(geod.geometry_area_perimeter(geom)[0])
-                total_area_km2 += area_m2 / 1e6
+        # Polygon math and the SQLite write are blocking; keep them off the event loop
+        with metrics.span("area_compute"):
+            total_area_km2 = await run_in_threadpool(geod_area_km2, district_geometries(features))
 
         if total_area_km2 == 0.0:
             print(f"⚠️ No valid boundaries found for {district}, {state}")
-
-        AREA_CACHE[key] = total_area_km2
-        with open(AREA_CACHE_FILE, "w") as f:
-            json.dump(AREA_CACHE, f, indent=2)
+            await run_in_threadpool(AREA_STORE.put_negative, key)
+        else:
+            await run_in_threadpool(AREA_STORE.put, key, total_area_km2)
 
         return total_area_km2
 
     except Exception as e:
+        # Short-lived negative: spares Geoapify during an outage, and never
+        # replaces a stored positive area
         print(f"⚠️ Error fetching area for {district}, {state}: {e}")
-        AREA_CACHE[key] = 0.0
+        metrics.inc("fallbacks_total", source="area")
+        await run_in_threadpool(AREA_STORE.put_negative, key, AREA_ERROR_TTL)
         return 0.0
 
-def get_location_features(state, district):
+async def get_location_features(state, district):
     """Fetch static features (LAI, population, sanitation, population density)."""
     try:
-        lai_entry = next(
-            (item for item in lai_data if item["District_Name"].lower() == district.lower()),
-            None,
-        )
-        LAI = float(lai_entry["Mean_LAI"]) if lai_entry else 0.0
+        with metrics.span("static_features"):
+            LAI, population = get_static_features(district)
 
-        pop_entry = next(
-            (item for item in pop_data if item["District"].lower() == district.lower()), None
-        )
-        population = float(pop_entry["Population"].replace(",", "")) if pop_entry else 0.0
-
-        try:
-            lat, lon = get_lat_long(state, district)
-        except ValueError as e:
-            print(f"⚠️ Unknown label while fetching lat/lon: {e}")
-            lat, lon = 0.0, 0.0
+            try:
+                lat, lon = get_lat_long(state, district)
+            except ValueError as e:
+                print(f"⚠️ Unknown label while fetching lat/lon: {e}")
+                lat, lon = 0.0, 0.0
 
-        area_km2 = get_district_area(state, district, lat, lon)
+        with metrics.span("area"):
+            area_km2 = await get_district_area(state, district, lat, lon)
         pop_density = population / area_km2 if area_km2 > 0 else 0.0
 
         return {
@@ -241,6 +318,7 @@ def get_location_features(state, district):
 
     except Exception as e:
         print(f"⚠️ Error in get_location_features for {district}, {state}: {e}")
+        metrics.inc("fallbacks_total", source="location_features")
         return {
             "LAI": 0.0,
             "Population": 0.0,
@@ -251,11 +329,445 @@ def get_location_features(state, district):
             "Longitude": 0.0,
         }
 
+def coordinates(weather, loc):
+    """(latitude, longitude) for a location: weatherstack's, or the dataset's when weather fell back."""
+    if weather["fallback"]:
+        return loc["Latitude"], loc["Longitude"]
+    return weather["latitude"], weather["longitude"]
+
+def build_input_row(state, district, disease, weather, loc, today):
+    """Build one model input row for a disease at a location.
+
+    With fallback weather, Temp/preci come from the seasonal normals for the
+    row's week instead of the placeholder readings (left out, and so 0, only
+    when no normals exist for that week at any level), and the coordinates
+    from the location features.
+    """
+    week = today.isocalendar()[1]
+    lat, lon = coordinates(weather, loc)
+    row = {
+        "state_ut": state,
+        "district": district,
+        "Disease": disease,
+        "week_of_outbreak": week,
+        "day": today.day,
+        "mon": today.month,
+        "year": today.year,
+    }
+    if weather["fallback"]:
+        normals, _ = get_climate_normals(state, district, week)
+        row.update(normals or {})
+    else:
+        row["temperature"] = weather["temperature"]
+        row["precip"] = weather["precip"]
+    row.update({
+        "feelslike": weather["feelslike"],
+        "humidity": weather["humidity"],
+        "wind_speed": weather["wind_speed"],
+        "cloudcover": weather["cloudcover"],
+        "pressure": weather["pressure"],
+        "visibility": weather["visibility"],
+        "LAI": loc["LAI"],
+        "Population": loc["Population"],
+        "Area_km2": loc["Area_km2"],
+        "Population_Density": loc["Population_Density"],
+        "Sanitation_Index": loc["Sanitation_Index"],
+        "pm2_5": weather["pm2_5"],
+        "pm10": weather["pm10"],
+        "no2": weather["no2"],
+        "o3": weather["o3"],
+        "so2": weather["so2"],
+        "co": weather["co"],
+        "aqi": weather["aqi"],
+        "Latitude": lat,
+        "Longitude": lon,
+    })
+    return row
+
+def build_result(disease, outbreak, probability, weather, loc):
+    """Per-disease response entry with the environmental context for the dashboard."""
+    lat, lon = coordinates(weather, loc)
+    return {
+        "Disease": disease,
+        "outbreak": outbreak,
+        "probability": probability,
+
+        # Static location features
+        "LAI": loc["LAI"],
+        "Population": int(loc["Population"]),
+        "Area_km2": loc["Area_km2"],
+        "Population_Density": loc["Population_Density"],
+        "Sanitation_Index": loc["Sanitation_Index"],
+        "Latitude": lat,
+        "Longitude": lon,
+
+        # Core air quality (for Environmental Factors panel)
+        "PM2_5": weather["pm2_5"],
+        "PM10": weather["pm10"],
+        "NO2": weather["no2"],
+        "O3": weather["o3"],
+        "SO2": weather["so2"],
+        "CO": weather["co"],
+        "AQI": weather["aqi"],
+        "US_EPA_Index": weather["us_epa_index"],
+        "GB_DEFRa_Index": weather["gb_defra_index"],
+
+        # Weather summary (for Key Factors panel)
+        "Temperature": weather["temperature"],
+        "FeelsLike": weather["feelslike"],
+        "Humidity": weather["humidity"],
+        "Precipitation": weather["precip"],
+        "Wind_Speed": weather["wind_speed"],
+        "Wind_Direction": weather["wind_dir"],
+        "Cloud_Cover": weather["cloudcover"],
+        "Visibility": weather["visibility"],
+        "Pressure": weather["pressure"],
+        "Weather_Description": weather["weather_description"],
+        "Is_Day": weather["is_day"],
+        "Localtime": weather["localtime"],
+        "Timezone": weather["timezone"],
+        "Weather_Stale": weather["stale"],
+        "Weather_Fallback": weather["fallback"],
+        "Weather_Fetched_At": weather["fetched_at"],
+    }
+
+def compact_predictions(predictions):
+    """Emit the shared weather/location context once, and only per-disease fields per entry."""
+    context = {k: v for k, v in predictions[0].items() if k not in PER_DISEASE_FIELDS} if predictions else {}
+    return {
+        "context": context,
+        "predictions": [{k: p[k] for k in PER_DISEASE_FIELDS if k in p} for p in predictions],
+    }
+
+def prediction_view(result, view):
+    if view == "compact":
+        return compact_predictions(result["predictions"])
+    return {"predictions": result["predictions"]}
+
+def score_rows(rows, features=None):
+    """Score a batch of input rows with a single call per model.
+
+    Rows whose prepared feature vector was scored before by the same model
+    files are served from the prediction cache; only the rest reach the
+    models. Cases and deaths are only estimated for rows predicted as
+    outbreaks, so the regressors run once on that subset. Pass `features`
+    when the rows were already assembled.
+    """
+    with metrics.span("prepare_input"):
+        if features is None:
+            features = assemble_features(rows)
+        thresholds = outbreak_thresholds([row["Disease"] for row in rows])
+    with metrics.span("prediction_cache"):
+        keys = PREDICTION_CACHE.keys_for(features, registry.get("model_fingerprint"))
+        cached = PREDICTION_CACHE.get_many(keys)
+
+    outbreak_proba = np.zeros(len(rows))
+    cases = np.zeros(len(rows))
+    deaths = np.zeros(len(rows))
+    miss = np.ones(len(rows), dtype=bool)
+    for i, key in enumerate(keys):
+        if key in cached:
+            outbreak_proba[i], cases[i], deaths[i] = cached[key]
+            miss[i] = False
+
+    if miss.any():
+        X = features[miss]
+        with metrics.span("model_outbreak"):
+            proba = registry.get("combined_model").predict_proba(X)[:, 1]
+        predicted = proba >= thresholds[miss]
+        new_cases = np.zeros(len(X))
+        new_deaths = np.zeros(len(X))
+        if predicted.any():
+            outbreak_rows = X[predicted]
+            with metrics.span("model_regressors"):
+                new_cases[predicted] = np.expm1(registry.get("cases_model").predict(outbreak_rows))
+                new_deaths[predicted] = registry.get("deaths_model").predict(outbreak_rows)
+
+        outbreak_proba[miss] = proba
+        cases[miss] = new_cases
+        deaths[miss] = new_deaths
+        miss_keys = [k for k, m in zip(keys, miss) if m]
+        PREDICTION_CACHE.put_many(zip(miss_keys, zip(proba, new_cases, new_deaths)))
+
+    outbreak_pred = outbreak_proba >= thresholds
+    return outbreak_proba, outbreak_pred, cases, deaths
+
+def explain_rows(features):
+    """Per-row attributions for an assembled feature matrix, computing only rows not explained before.
+
+    Attributions cost far more than a prediction, so they are cached by the
+    same feature-vector + model-fingerprint key as predictions, and all
+    uncached rows are explained in one batched call per model.
+    """
+    keys = PREDICTION_CACHE.keys_for(features, registry.get("model_fingerprint"))
+    explanations = [EXPLAIN_CACHE.get(key) for key in keys]
+    miss = [i for i, explanation in enumerate(explanations) if explanation is None]
+    metrics.inc("explanations_total", len(features) - len(miss), result="hit")
+    if miss:
+        metrics.inc("explanations_total", len(miss), result="miss")
+        with metrics.span("explain"):
+            fresh = registry.get("explainer").explain(features[miss])
+        for i, explanation in zip(miss, fresh):
+            EXPLAIN_CACHE.set(keys[i], explanation)
+            explanations[i] = explanation
+    return explanations
+
+def format_factors(values, explanation, output):
+    """Attributions for one model output, largest effect first."""
+    assembler = registry.get("feature_assembler")
+    contributions, base = explanation
+    factors = []
+    for name, value, contribution in zip(assembler.feature_order, values, contributions):
+        factor = {"feature": name, "value": float(value), "contribution": float(contribution)}
+        label = assembler.label(name, value)
+        if label is not None:
+            factor["label"] = label
+        factors.append(factor)
+    factors.sort(key=lambda f: abs(f["contribution"]), reverse=True)
+    return {"output": output, "base_value": base, "factors": factors}
+
+async def gather_location_context(location):
+    """Fetch weather and static location features for one location concurrently."""
+    with metrics.span("features"):
+        weather, loc = await asyncio.gather(
+            get_weather(location.state_ut, location.district),
+            get_location_features(location.state_ut, location.district),
+        )
+    return location, weather, loc
+
+async def score_contexts(contexts, today):
+    """Score gathered (location, weather, loc) contexts as one batched model pass."""
+    rows = []
+    for location, weather, loc in contexts:
+        for disease in DISEASES:
+            rows.append(build_input_row(location.state_ut, location.district, disease, weather, loc, today))
+
+    # Model inference is CPU-bound; keep it off the event loop
+    outbreak_proba, outbreak_pred, cases, deaths = await run_in_threadpool(score_rows, rows)
+
+    results = []
+    i = 0
+    for location, weather, loc in contexts:
+        predictions = []
+        for disease in DISEASES:
+            result = build_result(
+                disease, bool(outbreak_pred[i]), float(outbreak_proba[i]), weather, loc
+            )
+            if outbreak_pred[i]:
+                result["cases"] = int(cases[i])
+                result["deaths"] = int(deaths[i])
+            predictions.append(result)
+            i += 1
+        results.append({
+            "state_ut": location.state_ut,
+            "district": location.district,
+            "predictions": predictions,
+        })
+    return results
+
+async def predict_locations(locations):
+    """Predict all diseases for every location with one batched model pass."""
+    contexts = await asyncio.gather(*(gather_location_context(l) for l in locations))
+    return await score_contexts(contexts, datetime.today())
+
+def outlook_dates(today, weeks):
+    """One date per future week, starting a week from today."""
+    return [today + timedelta(weeks=k) for k in range(1, weeks + 1)]
+
+async def predict_outlook(location, weeks, climatology):
+    """Score every disease for each of the next `weeks` weeks from one weather/location snapshot.
+
+    The whole (week x disease) grid is assembled up front and scored by
+    score_rows, so each model runs once for the outlook. With `climatology`,
+    each week's Temp/preci come from the training data's seasonal means for
+    the district (or its state, or nationwide) instead of the live weather.
+    """
+    location, weather, loc = await gather_location_context(location)
+    dates = outlook_dates(datetime.today(), weeks)
+
+    rows = []
+    weeks_out = []
+    for date in dates:
+        week = {"week_start": date.date().isoformat(), "week_of_outbreak": date.isocalendar()[1], "year": date.year}
+        normals = None
+        if climatology:
+            normals, source = get_climate_normals(location.state_ut, location.district, week["week_of_outbreak"])
+            week["climate"] = {"source": source}
+            if normals is not None:
+                week["climate"].update({"Temperature": normals["Temp"] - 273.15, "preci": normals["preci"]})
+        for disease in DISEASES:
+            row = build_input_row(location.state_ut, location.district, disease, weather, loc, date)
+            if normals is not None:
+                row.update(normals)
+            rows.append(row)
+        weeks_out.append(week)
+
+    outbreak_proba, outbreak_pred, cases, deaths = await run_in_threadpool(score_rows, rows)
+
+    i = 0
+    for week in weeks_out:
+        predictions = []
+        for disease in DISEASES:
+            result = {"Disease": disease, "outbreak": bool(outbreak_pred[i]), "probability": float(outbreak_proba[i])}
+            if outbreak_pred[i]:
+                result["cases"] = int(cases[i])
+                result["deaths"] = int(deaths[i])
+            predictions.append(result)
+            i += 1
+        week["predictions"] = predictions
+
+    return {
+        "state_ut": location.state_ut,
+        "district": location.district,
+        "climatology": climatology,
+        "weather": {
+            "Temperature": weather["temperature"],
+            "Precipitation": weather["precip"],
+            "Humidity": weather["humidity"],
+            "Weather_Stale": weather["stale"],
+            "Weather_Fallback": weather["fallback"],
+            "Weather_Fetched_At": weather["fetched_at"],
+        },
+        "outlook": weeks_out,
+    }
+
+async def sweep_locations(locations):
+    """Yield prediction results for many locations as soon as their features arrive.
+
+    Feature gathering runs with at most SWEEP_CONCURRENCY locations in flight.
+    Every location whose features are ready is scored together in one batched
+    model call, so cached districts come back as one large matrix while
+    upstream-bound ones stream in as they finish.
+    """
+    today = datetime.today()
+    limit = asyncio.Semaphore(SWEEP_CONCURRENCY)
+
+    async def gather_limited(location):
+        async with limit:
+            return await gather_location_context(location)
+
+    pending = {asyncio.ensure_future(gather_limited(l)) for l in locations}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for result in await score_contexts([task.result() for task in done], today):
+                yield result
+    finally:
+        # Client went away mid-stream: stop fetching for the remaining districts
+        for task in pending:
+            task.cancel()
+
+async def stream_sweep(locations, fmt):
+    """Encode sweep results as NDJSON lines or server-sent events."""
+    async for result in sweep_locations(locations):
+        line = json.dumps(result)
+        yield f"data: {line}\n\n" if fmt == "sse" else line + "\n"
+
+def sweep_response(locations, fmt):
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_sweep(locations, fmt), media_type=media_type)
+
+def all_locations():
+    return [
+        LocationInput(state_ut=state, district=district)
+        for state in get_all_states()
+        for district in get_districts_by_state(state)
+    ]
+
+async def refresh_snapshot(min_interval=0.0):
+    """Predict every known district and publish the results as a new snapshot version.
+
+    Returns the published version, or None when another worker is already
+    building one or the latest snapshot is younger than `min_interval`. A
+    refresh that errors, or where most districts fell back to default
+    weather, is discarded and readers keep the previous snapshot.
+    """
+    # BEGIN IMMEDIATE may wait on another worker's write lock
+    version = await run_in_threadpool(
+        SNAPSHOT_STORE.begin, registry.get("model_fingerprint"), min_interval, SNAPSHOT_LEASE
+    )
+    if version is None:
+        return None
+
+    started = time.perf_counter()
+    total = fallbacks = 0
+    batch = []
+    try:
+        with metrics.span("snapshot_refresh"):
+            async for result in sweep_locations(all_locations()):
+                total += 1
+                if result["predictions"] and result["predictions"][0]["Weather_Fallback"]:
+                    fallbacks += 1
+                batch.append(result)
+                if len(batch) >= SNAPSHOT_BATCH:
+                    await run_in_threadpool(SNAPSHOT_STORE.add_results, version, batch)
+                    batch = []
+            if batch:
+                await run_in_threadpool(SNAPSHOT_STORE.add_results, version, batch)
+            if total and fallbacks / total > SNAPSHOT_MAX_FALLBACK_RATIO:
+                raise RuntimeError(f"weather unavailable for {fallbacks}/{total} districts")
+            districts = await run_in_threadpool(SNAPSHOT_STORE.publish, version)
+    except BaseException as e:  # cancellation at shutdown included
+        # Inline rather than awaited, so a second cancellation cannot skip it
+        SNAPSHOT_STORE.fail(version, str(e) or type(e).__name__)
+        metrics.inc("snapshot_refreshes_total", outcome="error")
+        print(f"⚠️ Snapshot v{version} discarded: {e or type(e).__name__}")
+        raise
+
+    metrics.inc("snapshot_refreshes_total", outcome="ok")
+    print(f"✅ Snapshot v{version}: {districts} districts in {time.perf_counter() - started:.1f}s")
+    return version
+
+async def snapshot_loop():
+    """Refresh the snapshot every SNAPSHOT_INTERVAL seconds; failures are retried next cycle."""
+    while True:
+        try:
+            # Half an interval of slack: skip if another worker published recently
+            await refresh_snapshot(min_interval=SNAPSHOT_INTERVAL / 2)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # already logged; the previous snapshot stays live
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
 # --- ROUTES ---
+@app.on_event("startup")
+async def startup():
+    if MODEL_LOAD_MODE == "background":
+        registry.start_background_load()
+    app.state.snapshot_task = asyncio.create_task(snapshot_loop()) if SNAPSHOT_INTERVAL > 0 else None
+    app.state.snapshot_refresh = None
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in (app.state.snapshot_task, app.state.snapshot_refresh):
+        if task is not None:
+            task.cancel()
+    await close_client()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to the Disease Outbreak Prediction API"}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe with per-artifact load status and timings (503 until all are loaded)."""
+    status = registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and sizes for the weather and prediction caches."""
+    return {
+        "weather": {**WEATHER_CACHE.stats, "size": len(WEATHER_CACHE), "maxsize": WEATHER_CACHE.maxsize},
+        "predictions": {**PREDICTION_CACHE.info(), "model_fingerprint": registry.get("model_fingerprint")},
+    }
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of stage timings, upstream calls and cache counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/states")
 def get_states():
     try:
@@ -276,131 +788,165 @@ def get_districts(state: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/area/{state}/{district}")
-def get_area(state: str, district: str, force_refresh: bool = Query(False)):
+async def get_area(state: str, district: str, force_refresh: bool = Query(False)):
     try:
         lat, lon = get_lat_long(state, district)
-        area_km2 = get_district_area(state, district, lat, lon, force_refresh=force_refresh)
+        area_km2 = await get_district_area(state, district, lat, lon, force_refresh=force_refresh)
         return {
             "state": state,
             "district": district,
             "latitude": lat,
             "longitude": lon,
             "area_km2": area_km2,
-            "cached": f"{state}_{district}".lower() in AREA_CACHE,
+            "cached": await run_in_threadpool(AREA_STORE.__contains__, f"{state}_{district}".lower()),
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/weather/{state}/{district}")
-def get_weather_only(state: str, district: str):
+async def get_weather_only(state: str, district: str):
     """Separate endpoint for weather data only (for testing/UI refresh)."""
     try:
-        weather_data = get_weather(state, district)
+        weather_data = await get_weather(state, district)
         return {"weather": weather_data, "location": f"{district}, {state}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+async def predict_one(request, location, view, conditional):
+    try:
+        results = await predict_locations([location])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return encoded_response(request, prediction_view(results[0], view), conditional=conditional)
+
 @app.post("/predict")
-def predict(input_data: LocationInput):
+async def predict(input_data: LocationInput, request: Request, view: str = Query("full", pattern=VIEW_PATTERN)):
     """Predict outbreak probability, cases, deaths, and return enhanced environmental context."""
+    return await predict_one(request, input_data, view, conditional=False)
+
+@app.get("/predict")
+async def predict_get(
+    request: Request,
+    state_ut: str,
+    district: str,
+    view: str = Query("full", pattern=VIEW_PATTERN),
+):
+    """Same as POST /predict, but cacheable: answers If-None-Match with 304 while the result is unchanged."""
+    return await predict_one(request, LocationInput(state_ut=state_ut, district=district), view, conditional=True)
+
+@app.post("/predict/batch")
+async def predict_batch(input_data: BatchLocationInput, request: Request,
+                        view: str = Query("full", pattern=VIEW_PATTERN)):
+    """Score several (state, district) pairs together in one batched model pass."""
+    if not input_data.locations:
+        raise HTTPException(status_code=400, detail="At least one location is required.")
+    if len(input_data.locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_LOCATIONS} locations can be scored per batch.",
+        )
     try:
-        diseases = ["Dengue", "Chikungunya", "Cholera"]
+        results = await predict_locations(input_data.locations)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    results = [
+        {"state_ut": r["state_ut"], "district": r["district"], **prediction_view(r, view)} for r in results
+    ]
+    return encoded_response(request, {"results": results})
+
+@app.post("/explain")
+async def explain(input_data: LocationInput, request: Request):
+    """Which features drove each disease's outbreak probability (and cases/deaths for predicted outbreaks)."""
+    try:
+        location, weather, loc = await gather_location_context(input_data)
         today = datetime.today()
-        day, mon, year, week = today.day, today.month, today.year, today.isocalendar()[1]
-
-        weather = get_weather(input_data.state_ut, input_data.district)
-        loc = get_location_features(input_data.state_ut, input_data.district)
-
-        results = []
-        for disease in diseases:
-            # Enhanced input row with new weather features (add to your model features if needed)
-            row = {
-                "state_ut": input_data.state_ut,
-                "district": input_data.district,
-                "Disease": disease,
-                "week_of_outbreak": week,
-                "day": day,
-                "mon": mon,
-                "year": year,
-                "temperature": weather["temperature"],
-                "feelslike": weather["feelslike"],
-                "humidity": weather["humidity"],
-                "precip": weather["precip"],
-                "wind_speed": weather["wind_speed"],
-                "cloudcover": weather["cloudcover"],
-                "pressure": weather["pressure"],
-                "visibility": weather["visibility"],
-                "LAI": loc["LAI"],
-                "Population": loc["Population"],
-                "Area_km2": loc["Area_km2"],
-                "Population_Density": loc["Population_Density"],
-                "Sanitation_Index": loc["Sanitation_Index"],
-                "pm2_5": weather["pm2_5"],
-                "pm10": weather["pm10"],
-                "no2": weather["no2"],
-                "o3": weather["o3"],
-                "so2": weather["so2"],
-                "co": weather["co"],
-                "aqi": weather["aqi"],
-                "Latitude": weather["latitude"],
-                "Longitude": weather["longitude"],
-            }
-
-            df = pd.DataFrame([row])
-            df_prepared = prepare_input(df)  # Ensure prepare_input handles new features
-            outbreak_proba = combined_model.predict_proba(df_prepared)[:, 1]
-            outbreak_pred = (outbreak_proba >= 0.45).astype(int)
-
-            result = {
-                "Disease": disease,
-                "outbreak": bool(outbreak_pred[0]),
-                "probability": float(outbreak_proba[0]),
-                
-                # Static location features
-                "LAI": loc["LAI"],
-                "Population": int(loc["Population"]),
-                "Area_km2": loc["Area_km2"],
-                "Population_Density": loc["Population_Density"],
-                "Sanitation_Index": loc["Sanitation_Index"],
-                "Latitude": weather["latitude"],
-                "Longitude": weather["longitude"],
-                
-                # Core air quality (for Environmental Factors panel)
-                "PM2_5": weather["pm2_5"],
-                "PM10": weather["pm10"],
-                "NO2": weather["no2"],
-                "O3": weather["o3"],
-                "SO2": weather["so2"],
-                "CO": weather["co"],
-                "AQI": weather["aqi"],
-                "US_EPA_Index": weather["us_epa_index"],
-                "GB_DEFRa_Index": weather["gb_defra_index"],
-                
-                # Weather summary (for Key Factors panel)
-                "Temperature": weather["temperature"],
-                "FeelsLike": weather["feelslike"],
-                "Humidity": weather["humidity"],
-                "Precipitation": weather["precip"],
-                "Wind_Speed": weather["wind_speed"],
-                "Wind_Direction": weather["wind_dir"],
-                "Cloud_Cover": weather["cloudcover"],
-                "Visibility": weather["visibility"],
-                "Pressure": weather["pressure"],
-                "Weather_Description": weather["weather_description"],
-                "Is_Day": weather["is_day"],
-                "Localtime": weather["localtime"],
-                "Timezone": weather["timezone"],
-            }
-
-            if outbreak_pred[0]:
-                result["cases"] = int(np.expm1(cases_model.predict(df_prepared))[0])
-                result["deaths"] = int(deaths_model.predict(df_prepared)[0])
-
-            results.append(result)
-
-        return {"predictions": results}
+        rows = [build_input_row(location.state_ut, location.district, d, weather, loc, today) for d in DISEASES]
+        # One feature matrix feeds both the models and the explainer
+        features = await run_in_threadpool(assemble_features, rows)
+        outbreak_proba, outbreak_pred, cases, deaths = await run_in_threadpool(score_rows, rows, features)
+        explanations = await run_in_threadpool(explain_rows, features)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+    results = []
+    for i, disease in enumerate(DISEASES):
+        result = {
+            "Disease": disease,
+            "outbreak": bool(outbreak_pred[i]),
+            "probability": float(outbreak_proba[i]),
+            "explanation": {"outbreak": format_factors(features[i], explanations[i]["outbreak"], "probability")},
+        }
+        if outbreak_pred[i]:
+            result["cases"] = int(cases[i])
+            result["deaths"] = int(deaths[i])
+            result["explanation"]["cases"] = format_factors(features[i], explanations[i]["cases"], "log1p(cases)")
+            result["explanation"]["deaths"] = format_factors(features[i], explanations[i]["deaths"], "deaths")
+        results.append(result)
+    return encoded_response(request, {
+        "state_ut": location.state_ut,
+        "district": location.district,
+        "weather_fallback": weather["fallback"],
+        "predictions": results,
+    })
+
+@app.post("/predict/outlook")
+async def predict_outlook_endpoint(input_data: OutlookInput):
+    """Outbreak outlook for every disease over the next 1-12 weeks, scored as one batch."""
+    try:
+        return await predict_outlook(input_data, input_data.weeks, input_data.climatology)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/predict/state/{state}")
+async def predict_state(state: str, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """Stream predictions for every district of a state (NDJSON by default, or SSE)."""
+    canonical = resolve_state(state)
+    districts = get_districts_by_state(state)
+    if canonical is None or not districts:
+        raise HTTPException(status_code=404, detail=f"No districts found for '{state}'.")
+    locations = [LocationInput(state_ut=canonical, district=d) for d in districts]
+    return sweep_response(locations, format)
+
+@app.get("/predict/all")
+async def predict_all(format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """Stream predictions for every known district in India (NDJSON by default, or SSE)."""
+    return sweep_response(all_locations(), format)
+
+# Snapshot reads are plain `def` handlers: FastAPI runs them in its threadpool,
+# so a SQLite busy wait never blocks the event loop
+@app.get("/snapshot")
+def snapshot_status():
+    """Latest published snapshot and the most recent refresh attempt."""
+    return {**SNAPSHOT_STORE.status(), "interval": SNAPSHOT_INTERVAL}
+
+@app.post("/snapshot/refresh", status_code=202)
+async def snapshot_refresh():
+    """Start a snapshot refresh in the background (no-op if this worker is already running one)."""
+    task = app.state.snapshot_refresh
+    if task is None or task.done():
+        task = app.state.snapshot_refresh = asyncio.create_task(refresh_snapshot())
+        # Failures are logged by refresh_snapshot; don't warn about an unretrieved exception
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return {"started": True}
+    return {"started": False}
+
+@app.get("/snapshot/{state}/{district}")
+def snapshot_district(state: str, district: str):
+    """Precomputed predictions for a district from the latest snapshot, with its "as of" time."""
+    # Stored under encoder labels: some districts differ only by case
+    canonical_state = resolve_state(state) or state
+    canonical_district = registry.get("label_resolvers")["district"].match(district) or district
+    found = SNAPSHOT_STORE.get(canonical_state, canonical_district)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No snapshot for {district}, {state}.")
+    info, result = found
+    return {**info, **result}
@@ -0,0 +1,183 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Set METRICS_ENABLED=0 to turn spans and counters into no-ops
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# Add a Server-Timing header with per-stage durations to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Spans recorded during the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """In-process counters and latency histograms rendered in Prometheus text format.
+
+    Updates take one lock and a bisect, so they are cheap enough for the
+    request hot path. Collectors registered with `register_collector` are
+    read at scrape time, which lets existing stats dicts (cache hit counts)
+    be exported without double bookkeeping.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            hist[0][slot] += 1
+            hist[1] += seconds
+            hist[2] += 1
+
+    @contextmanager
+    def span(self, stage):
+        """Time a block as `stage_duration_seconds{stage=...}` and add it to Server-Timing."""
+        if not METRICS_ENABLED:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe("stage_duration_seconds", elapsed, stage=stage)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.append((stage, elapsed))
+
+    def register_collector(self, collector):
+        """`collector()` returns (name, type, labels dict, value) tuples at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (list(v[0]), v[1], v[2]) for k, v in self._histograms.items()}
+
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault((name, "counter"), []).append(f"{name}{_format_labels(labels)} {value}")
+        for collector in self._collectors:
+            for name, kind, labels, value in collector():
+                labels = tuple(sorted(labels.items()))
+                families.setdefault((name, kind), []).append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in histograms.items():
+            lines = families.setdefault((name, "histogram"), [])
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        out = []
+        for (name, kind), lines in sorted(families.items()):
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+def server_timing_header(timings, total):
+    """Aggregate spans by stage: `stage;dur=ms` (with a count when a stage ran more than once)."""
+    stages = {}
+    for stage, elapsed in timings:
+        duration, count = stages.get(stage, (0.0, 0))
+        stages[stage] = (duration + elapsed, count + 1)
+    parts = [
+        f'{stage};dur={1000 * duration:.2f}' + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (duration, count) in stages.items()
+    ]
+    parts.append(f"total;dur={1000 * total:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency by route template, plus the optional Server-Timing header."""
+
+    def __init__(self, app, registry, server_timing=SERVER_TIMING):
+        self.app = app
+        self.metrics = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Route templates keep label cardinality bounded (no raw district names)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(
+                "http_request_duration_seconds", time.perf_counter() - started,
+                method=scope["method"], route=route, status=status,
+            )
+
+
+metrics = Metrics()
+metrics.describe("stage_duration_seconds", "Time spent in each instrumented stage of request handling.")
+metrics.describe("http_request_duration_seconds", "End-to-end request latency by route template.")
+metrics.describe("upstream_request_duration_seconds", "Latency of calls to weatherstack and Geoapify.")
+metrics.describe("upstream_requests_total", "Upstream API calls by host and outcome.")
+metrics.describe("fallbacks_total", "Requests served with fallback values after an upstream failure.")
+metrics.describe("area_lookups_total", "District area store lookups by result.")
+metrics.describe("snapshot_refreshes_total", "Background snapshot refreshes by outcome.")
+metrics.describe("explanations_total", "Rows explained by /explain, by attribution cache result.")
+metrics.describe("cache_events_total", "Weather and prediction cache hits, misses and errors.")
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from app.climatology import CLIMATOLOGY_COLUMNS, build_climatology
+from app.columnar import load_processed_data
+from app.fast_ensemble import BatchDispatchModel, FastEnsemble
+from app.feature_assembler import FeatureAssembler, NamedFeatureModel
+from app.label_resolver import LabelResolver
+from app.location_index import build_location_index, normalize_name
+from app.prediction_cache import model_fingerprint
+
+# eager: load everything at import | background: load in a thread at startup | lazy: on first use
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "eager").lower()
+
+# Serve the exported NumPy ensemble when present (set FAST_ENSEMBLE=0 to force the pickle)
+FAST_ENSEMBLE_FILE = "models/combined_outbreak_model_fast.npz"
+USE_FAST_ENSEMBLE = os.getenv("FAST_ENSEMBLE", "1") != "0"
+# Larger batches go to the pickled ensemble, which is faster past this size (0 = never)
+FAST_ENSEMBLE_MAX_ROWS = int(os.getenv("FAST_ENSEMBLE_MAX_ROWS", 1000))
+COMBINED_MODEL_FILE = "models/combined_outbreak_model.pkl"
+
+# Memory-mapped columnar copy of processed_data.csv written by preprocessing
+PROCESSED_CSV = "data/processed_data.csv"
+PROCESSED_COLUMNS = "data/processed_columns"
+LOCATION_COLUMNS = ["state_ut", "district", "Latitude", "Longitude"]
+
+# Outbreak decision thresholds chosen by src/evaluation.py
+THRESHOLDS_FILE = "models/thresholds.json"
+DEFAULT_OUTBREAK_THRESHOLD = 0.45
+
+
+class ModelRegistry:
+    """Loads each model/data artifact once per process and records how long it took.
+
+    Artifacts are registered with a loader and materialized on the first
+    `get`, under a per-artifact lock so concurrent first requests share one
+    load. Loaders may `get` other artifacts; their timings are inclusive.
+    Artifacts registered with `preload=False` are skipped by `load_all` and
+    readiness, and only load when an endpoint first needs them.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._locks = {}
+        self._artifacts = {}
+        self._timings = {}
+        self._errors = {}
+        self._background = None
+        self._on_demand = set()
+
+    def register(self, name, loader, preload=True):
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+        if not preload:
+            self._on_demand.add(name)
+
+    def get(self, name):
+        try:
+            return self._artifacts[name]
+        except KeyError:
+            pass
+        with self._locks[name]:
+            if name not in self._artifacts:
+                started = time.perf_counter()
+                try:
+                    self._artifacts[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._timings[name] = time.perf_counter() - started
+                self._errors.pop(name, None)
+                print(f"📦 Loaded {name} in {self._timings[name]:.3f}s")
+        return self._artifacts[name]
+
+    def load_all(self):
+        for name in self._loaders:
+            if name in self._on_demand:
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️ Failed to load {name}: {e}")
+
+    def start_background_load(self):
+        if self._background is None:
+            self._background = threading.Thread(target=self.load_all, daemon=True)
+            self._background.start()
+
+    def is_ready(self):
+        return all(name in self._artifacts for name in self._loaders if name not in self._on_demand)
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "mode": MODEL_LOAD_MODE,
+            "artifacts": {
+                name: {
+                    "loaded": name in self._artifacts,
+                    "preload": name not in self._on_demand,
+                    "seconds": round(self._timings[name], 4) if name in self._timings else None,
+                    "error": self._errors.get(name),
+                }
+                for name in self._loaders
+            },
+        }
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _pickled_combined_model():
+    # Fitted on a DataFrame; the wrapper lets it take assembled arrays quietly
+    return NamedFeatureModel(registry.get("combined_ensemble"), registry.get("feature_order"))
+
+
+def _load_combined_model():
+    if USE_FAST_ENSEMBLE and os.path.exists(FAST_ENSEMBLE_FILE):
+        fast = FastEnsemble.load(FAST_ENSEMBLE_FILE)
+        return BatchDispatchModel(fast, _pickled_combined_model, FAST_ENSEMBLE_MAX_ROWS)
+    return _pickled_combined_model()
+
+
+def _load_thresholds():
+    """Global and per-disease (normalized name) outbreak thresholds."""
+    if not os.path.exists(THRESHOLDS_FILE):
+        print(f"⚠️ {THRESHOLDS_FILE} not found; using threshold {DEFAULT_OUTBREAK_THRESHOLD}")
+        return {"default": DEFAULT_OUTBREAK_THRESHOLD, "per_disease": {}}
+    data = _load_json(THRESHOLDS_FILE)
+    return {
+        "default": float(data["default"]["threshold"]),
+        "per_disease": {
+            normalize_name(name): float(entry["threshold"])
+            for name, entry in data.get("per_disease", {}).items()
+        },
+    }
+
+
+def _load_explainer():
+    # Imported here so scipy.sparse (and shap, if installed) stay off the startup path
+    from app.explain import ModelExplainer
+
+    return ModelExplainer(
+        registry.get("combined_ensemble"),
+        registry.get("cases_model"),
+        registry.get("deaths_model"),
+        registry.get("feature_order"),
+    )
+
+
+registry = ModelRegistry()
+
+# --- Models ---
+registry.register("combined_model", _load_combined_model)
+registry.register("cases_model", lambda: joblib.load("models/xgb_cases_model.pkl"))
+registry.register("deaths_model", lambda: joblib.load("models/xgb_deaths_model.pkl"))
+registry.register("model_fingerprint", lambda: model_fingerprint("models"))
+registry.register("thresholds", _load_thresholds)
+
+# The full pickled ensemble: large batches and attribution; loaded on first use
+registry.register("combined_ensemble", lambda: joblib.load(COMBINED_MODEL_FILE), preload=False)
+registry.register("explainer", _load_explainer, preload=False)
+
+# --- Encoders and feature schema ---
+registry.register("label_encoders", lambda: joblib.load("models/label_encoders.pkl"))
+registry.register("feature_order", lambda: np.load("models/feature_order.npy", allow_pickle=True))
+registry.register(
+    "label_resolvers",
+    lambda: {col: LabelResolver(le.classes_) for col, le in registry.get("label_encoders").items()},
+)
+registry.register(
+    "feature_assembler",
+    lambda: FeatureAssembler(registry.get("feature_order"), registry.get("label_resolvers")),
+)
+
+# --- Location data ---
+registry.register(
+    "location_data",
+    lambda: load_processed_data(PROCESSED_CSV, PROCESSED_COLUMNS, columns=LOCATION_COLUMNS),
+)
+registry.register(
+    "location_index",
+    lambda: build_location_index(
+        registry.get("location_data"),
+        registry.get("label_encoders"),
+        _load_json("data/LAI.json"),
+        _load_json("data/Population.json"),
+    ),
+)
+registry.register(
+    "climatology",
+    lambda: build_climatology(
+        load_processed_data(PROCESSED_CSV, PROCESSED_COLUMNS, columns=CLIMATOLOGY_COLUMNS),
+        registry.get("label_encoders"),
+    ),
+)
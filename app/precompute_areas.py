@@ -0,0 +1,190 @@
+"""Precompute district areas into the shared area store ahead of deployment.
+
+Walks every (state, district) pair known to the label encoders and
+processed_data.csv, loads its boundary GeoJSON (from a local directory or
+from Geoapify, in parallel), computes all areas in one vectorized pass and
+upserts them into the SQLite area store.
+
+Usage (from the repository root):
+    python -m app.precompute_areas --geojson-dir data/boundaries
+    python -m app.precompute_areas --concurrency 8 --only-missing
+
+Local GeoJSON files are named after the store key, e.g.
+`maharashtra_pune.geojson`, and hold the Geoapify FeatureCollection.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+from dotenv import load_dotenv
+
+from app.area_store import AreaStore
+from app.columnar import load_processed_data
+from app.geo import district_geometries, geodesic_areas_km2
+from app.location_index import build_location_index
+
+load_dotenv()
+GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY")
+GEOAPIFY_API_URL = os.getenv("GEOAPIFY_API_URL", "https://api.geoapify.com/v1/boundaries/part-of")
+
+
+def area_key(state, district):
+    # Same key format get_district_area uses
+    return f"{state}_{district}".lower()
+
+
+def known_locations(encoders_path, data_path, columnar_path=None):
+    """All (state, district, lat, lon) pairs the serving side can be asked about."""
+    label_encoders = joblib.load(encoders_path)
+    location_data = load_processed_data(
+        data_path, columnar_path or "", columns=["state_ut", "district", "Latitude", "Longitude"]
+    )
+    index = build_location_index(location_data, label_encoders, [], [])
+    return [
+        (rec["state_ut"], rec["district"], rec["Latitude"], rec["Longitude"])
+        for rec in index["locations"].values()
+    ]
+
+
+def read_local_boundaries(geojson_dir, keys, workers):
+    """Read `<key>.geojson` files in parallel; returns key -> features or an error string."""
+    def load(key):
+        for ext in (".geojson", ".json"):
+            path = os.path.join(geojson_dir, key + ext)
+            if os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        return key, json.load(f).get("features", [])
+                except Exception as e:
+                    return key, f"unreadable {path}: {e}"
+        return key, "no boundary file"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(load, keys))
+
+
+async def fetch_remote_boundaries(locations, concurrency):
+    """Fetch Geoapify boundaries for every location with bounded concurrency."""
+    from app.http_client import close_client, get_json
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch(state, district, lat, lon):
+        key = area_key(state, district)
+        async with limit:
+            try:
+                res = await get_json(
+                    GEOAPIFY_API_URL,
+                    params={"lat": lat, "lon": lon, "geometry": "geometry_1000", "apiKey": GEOAPIFY_API_KEY},
+                    timeout=15,
+                )
+                return key, res.get("features", [])
+            except Exception as e:
+                return key, f"fetch failed: {e}"
+
+    try:
+        results = await asyncio.gather(*(fetch(*loc) for loc in locations))
+    finally:
+        await close_client()
+    return dict(results)
+
+
+def precompute(locations, store, geojson_dir=None, concurrency=8):
+    """Compute and store areas for `locations`; returns a summary report dict."""
+    started = time.perf_counter()
+    keys = [area_key(state, district) for state, district, _, _ in locations]
+
+    if geojson_dir:
+        boundaries = read_local_boundaries(geojson_dir, keys, concurrency)
+    else:
+        boundaries = asyncio.run(fetch_remote_boundaries(locations, concurrency))
+    loaded = time.perf_counter()
+
+    failures = {}
+    computed_keys = []
+    groups = []
+    for key in keys:
+        features = boundaries.get(key)
+        if isinstance(features, str):
+            failures[key] = features
+            continue
+        if not features:
+            failures[key] = "no boundary features"
+            continue
+        computed_keys.append(key)
+        groups.append(district_geometries(features))
+
+    areas = geodesic_areas_km2(groups)
+    computed = time.perf_counter()
+
+    positives = []
+    negatives = []
+    for key, area in zip(computed_keys, areas):
+        if area > 0:
+            positives.append((key, float(area)))
+        else:
+            failures[key] = "no district-level polygons"
+            negatives.append(key)
+    store.put_many(positives)
+    # Only a real "no district polygons" answer is cached; fetch/read failures
+    # leave the store untouched so existing areas survive an outage
+    for key in negatives:
+        store.put_negative(key)
+    finished = time.perf_counter()
+
+    elapsed = finished - started
+    return {
+        "locations": len(keys),
+        "stored": len(positives),
+        "failed": len(failures),
+        "seconds_total": round(elapsed, 3),
+        "seconds_loading": round(loaded - started, 3),
+        "seconds_computing": round(computed - loaded, 3),
+        "seconds_writing": round(finished - computed, 3),
+        "locations_per_second": round(len(keys) / elapsed, 1) if elapsed > 0 else None,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute district areas into the area store.")
+    parser.add_argument("--geojson-dir", help="Read boundaries from <key>.geojson files instead of Geoapify")
+    parser.add_argument("--store", default=os.getenv("AREA_STORE_PATH", "data/district_area.sqlite3"))
+    parser.add_argument("--encoders", default="models/label_encoders.pkl")
+    parser.add_argument("--data", default="data/processed_data.csv")
+    parser.add_argument("--columns", default="data/processed_columns",
+                        help="Columnar copy of --data, used when it is up to date")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Parallel reads/fetches (remote fetches are also capped by HTTP_PER_HOST_LIMIT)")
+    parser.add_argument("--only-missing", action="store_true", help="Skip districts already in the store")
+    parser.add_argument("--report", help="Also write the summary report as JSON to this path")
+    args = parser.parse_args()
+
+    store = AreaStore(args.store, seed_json="data/District_Area.json")
+    locations = known_locations(args.encoders, args.data, args.columns)
+    if args.only_missing:
+        locations = [loc for loc in locations if area_key(loc[0], loc[1]) not in store]
+
+    print(f"🌍 Precomputing areas for {len(locations)} districts...")
+    report = precompute(locations, store, geojson_dir=args.geojson_dir, concurrency=args.concurrency)
+
+    print(f"✅ Stored {report['stored']} areas, {report['failed']} failures "
+          f"in {report['seconds_total']}s ({report['locations_per_second']} districts/s)")
+    print(f"   load {report['seconds_loading']}s | compute {report['seconds_computing']}s "
+          f"| write {report['seconds_writing']}s")
+    for key, reason in list(report["failures"].items())[:20]:
+        print(f"⚠️ {key}: {reason}")
+    if report["failed"] > 20:
+        print(f"⚠️ ... and {report['failed'] - 20} more")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
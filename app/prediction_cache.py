@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from app.cache import TTLCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key TEXT PRIMARY KEY,
+    probability REAL NOT NULL,
+    cases REAL NOT NULL,
+    deaths REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def model_fingerprint(models_dir="models"):
+    """Content hash of every artifact in `models/`; changes whenever a model is retrained."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(models_dir)):
+        path = os.path.join(models_dir, name)
+        if not os.path.isfile(path):
+            continue
+        digest.update(name.encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Per-row prediction cache keyed by the prepared feature vector and model fingerprint.
+
+    Values are (probability, cases, deaths) tuples. A bounded in-process
+    TTL/LRU cache sits in front of an optional SQLite file that every uvicorn
+    worker can read, so one worker's results are reused by the others.
+    """
+
+    def __init__(self, ttl, maxsize, shared_path=None):
+        self.memory = TTLCache(ttl=ttl, maxsize=maxsize)
+        self.ttl = ttl
+        self.shared_path = shared_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+        if shared_path:
+            with self._connect() as conn:
+                conn.execute(SCHEMA)
+                conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (time.time(),))
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def keys_for(X, fingerprint):
+        """One key per row of the prepared (float64) feature matrix."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        prefix = fingerprint.encode()
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).hexdigest() for row in X]
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+        memory_hits = len(found)
+
+        missing = [k for k in keys if k not in found]
+        if missing and self.shared_path:
+            now = time.time()
+            placeholders = ",".join("?" * len(missing))
+            rows = self._connect().execute(
+                f"SELECT key, probability, cases, deaths FROM predictions "
+                f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*missing, now),
+            ).fetchall()
+            for key, probability, cases, deaths in rows:
+                found[key] = (probability, cases, deaths)
+                self.memory.set(key, found[key])
+
+        with self._lock:
+            self.stats["hits"] += memory_hits
+            self.stats["shared_hits"] += len(found) - memory_hits
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        items = [(k, tuple(float(x) for x in v)) for k, v in items]
+        for key, value in items:
+            self.memory.set(key, value)
+        if items and self.shared_path:
+            expires_at = time.time() + self.ttl
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    [(k, *v, expires_at) for k, v in items],
+                )
+
+    def info(self):
+        return {**self.stats, "size": len(self.memory), "maxsize": self.memory.maxsize,
+                "ttl": self.ttl, "shared": bool(self.shared_path)}
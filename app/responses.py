@@ -0,0 +1,122 @@
+"""Response encoding for the prediction endpoints.
+
+Bodies are serialized with orjson (or MessagePack when the client asks for
+`application/msgpack`), compressed with brotli or gzip according to
+`Accept-Encoding`, and tagged with an ETag so repeated GETs can be answered
+with `304 Not Modified`. msgpack and brotli are optional; without them the
+API simply never offers those formats.
+"""
+import gzip
+import hashlib
+import json
+import os
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (the headers would eat the savings)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 512))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def dumps_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _accepted(header):
+    """Names in an Accept/Accept-Encoding header that are not refused with q=0."""
+    names = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                pass
+        if name:
+            names.add(name.strip().lower())
+    return names
+
+
+def negotiate_media_type(accept):
+    if msgpack is not None and _accepted(accept) & set(MSGPACK_TYPES):
+        return "application/msgpack"
+    return "application/json"
+
+
+def negotiate_encoding(accept_encoding):
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def encode_body(payload, media_type):
+    if media_type == "application/msgpack":
+        return msgpack.packb(payload, use_bin_type=True)
+    return dumps_json(payload)
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def etag_for(body):
+    # Weak: the same representation is sent with different content codings
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def encoded_response(request, payload, conditional=False):
+    """Serialize, tag and compress `payload` as the client negotiated.
+
+    With `conditional`, a matching If-None-Match gets an empty 304 (only
+    safe for GET; POST responses still carry the ETag but are always sent).
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    body = encode_body(payload, media_type)
+    etag = etag_for(body)
+    headers = {"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+    if conditional:
+        headers["Cache-Control"] = "no-cache"  # store, but revalidate every time
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    completed_at REAL,
+    model_fingerprint TEXT,
+    districts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshot_results (
+    version INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    district TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (version, state, district)
+) WITHOUT ROWID;
+"""
+
+LATEST_COMPLETE = """
+SELECT version, completed_at, model_fingerprint, districts FROM snapshots
+WHERE status = 'complete' ORDER BY version DESC LIMIT 1
+"""
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def _snapshot_info(row):
+    version, completed_at, fingerprint, districts = row
+    return {"version": version, "as_of": _iso(completed_at), "model_fingerprint": fingerprint, "districts": districts}
+
+
+class SnapshotStore:
+    """Versioned tables of precomputed per-district predictions in SQLite (WAL mode).
+
+    A refresh writes its results under a new version while readers keep
+    seeing the previous one; `publish` flips the latest complete version in a
+    single update. Failed or abandoned refreshes never become visible, so
+    readers always get the last good snapshot. Only `keep` complete versions
+    are retained. The file is shared by every uvicorn worker, and `begin`
+    lets only one of them build a snapshot at a time.
+    """
+
+    def __init__(self, path, keep=3):
+        self.path = path
+        self.keep = keep
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def begin(self, model_fingerprint, min_interval, lease):
+        """Start a new version, or return None if another build is running or the latest is fresh.
+
+        A build is considered abandoned (crashed worker) once it has run for
+        `lease` seconds without publishing.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            building = conn.execute(
+                "SELECT 1 FROM snapshots WHERE status = 'building' AND started_at > ?", (now - lease,)
+            ).fetchone()
+            latest = conn.execute(LATEST_COMPLETE).fetchone()
+            if building or (latest and now - latest[1] < min_interval):
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "DELETE FROM snapshot_results WHERE version IN "
+                "(SELECT version FROM snapshots WHERE status = 'building')"
+            )
+            conn.execute(
+                "UPDATE snapshots SET status = 'failed', error = 'abandoned' WHERE status = 'building'"
+            )
+            version = conn.execute(
+                "INSERT INTO snapshots (status, started_at, model_fingerprint) VALUES ('building', ?, ?)",
+                (now, model_fingerprint),
+            ).lastrowid
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def add_results(self, version, results):
+        """Store per-location results under a building version, keyed by their canonical labels."""
+        rows = [
+            (version, r["state_ut"], r["district"], json.dumps(r))
+            for r in results
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO snapshot_results VALUES (?, ?, ?, ?)", rows)
+
+    def publish(self, version):
+        """Make a built version the one readers see, and drop versions beyond `keep`."""
+        with self._connect() as conn:
+            districts = conn.execute(
+                "SELECT COUNT(*) FROM snapshot_results WHERE version = ?", (version,)
+            ).fetchone()[0]
+            conn.execute(
+                "UPDATE snapshots SET status = 'complete', completed_at = ?, districts = ? WHERE version = ?",
+                (time.time(), districts, version),
+            )
+            kept = [v for (v,) in conn.execute(
+                "SELECT version FROM snapshots WHERE status = 'complete' ORDER BY version DESC LIMIT ?",
+                (self.keep,),
+            )]
+            # Older complete versions go, along with failed attempts that predate them
+            conn.execute("DELETE FROM snapshot_results WHERE version < ?", (min(kept),))
+            conn.execute("DELETE FROM snapshots WHERE version < ?", (min(kept),))
+        return districts
+
+    def fail(self, version, error):
+        """Mark a build as failed and discard its partial results."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE snapshots SET status = 'failed', completed_at = ?, error = ? WHERE version = ?",
+                (time.time(), str(error)[:500], version),
+            )
+            conn.execute("DELETE FROM snapshot_results WHERE version = ?", (version,))
+
+    def latest(self):
+        row = self._connect().execute(LATEST_COMPLETE).fetchone()
+        return _snapshot_info(row) if row else None
+
+    def get(self, state, district):
+        """(snapshot info, result dict) for canonical labels from the latest complete version, or None."""
+        row = self._connect().execute(
+            """
+            SELECT s.version, s.completed_at, s.model_fingerprint, s.districts, r.result
+            FROM (""" + LATEST_COMPLETE + """) AS s
+            JOIN snapshot_results AS r
+              ON r.version = s.version AND r.state = ? AND r.district = ?
+            """,
+            (state, district),
+        ).fetchone()
+        if row is None:
+            return None
+        return _snapshot_info(row[:4]), json.loads(row[4])
+
+    def status(self):
+        """Latest complete snapshot and the most recent refresh attempt."""
+        attempt = self._connect().execute(
+            "SELECT version, status, started_at, completed_at, error FROM snapshots ORDER BY version DESC LIMIT 1"
+        ).fetchone()
+        last_attempt = None
+        if attempt:
+            version, status, started_at, completed_at, error = attempt
+            last_attempt = {
+                "version": version, "status": status, "started_at": _iso(started_at),
+                "completed_at": _iso(completed_at), "error": error,
+            }
+        return {"latest": self.latest(), "last_attempt": last_attempt}
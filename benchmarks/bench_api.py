@@ -0,0 +1,308 @@
+"""Latency/throughput benchmark suite for the model layer and the API.
+
+Micro-benchmarks time the hot helpers (assemble_features, prepare_input,
+get_lat_long, get_location_features) and each model's predict on a /predict
+sized batch. The load test then drives /predict, /districts/{state} and
+/weather/{state}/{district} in-process through httpx's ASGI transport. Local
+stub servers stand in for weatherstack and Geoapify.
+
+Run from the repository root:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --requests 500 --concurrency 32 --upstream-latency-ms 80
+    python benchmarks/bench_api.py --compare benchmarks/results/<previous>.json
+
+Results are written as JSON to benchmarks/results/ (or --output) so runs can be compared.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+WEATHER_STUB = {
+    "current": {
+        "temperature": 30, "feelslike": 33, "humidity": 70, "precip": 2.0, "wind_speed": 9,
+        "wind_dir": "SW", "pressure": 1008, "cloudcover": 40, "visibility": 10, "is_day": "yes",
+        "weather_descriptions": ["Partly cloudy"],
+        "air_quality": {"pm2_5": "40", "pm10": "60", "no2": "12", "o3": "30", "so2": "4", "co": "300",
+                        "us-epa-index": "2", "gb-defra-index": "3"},
+    },
+    "location": {"lat": "18.5", "lon": "73.9", "localtime": "2025-01-01 12:00", "timezone_id": "Asia/Kolkata"},
+}
+BOUNDARY_STUB = {
+    "features": [{
+        "properties": {"admin_level": 5},
+        "geometry": {"type": "Polygon",
+                     "coordinates": [[[73.5, 18.3], [74.5, 18.3], [74.5, 19.0], [73.5, 19.0], [73.5, 18.3]]]},
+    }]
+}
+
+
+# --- Upstream stubs ---
+class StubUpstream:
+    """Weatherstack/Geoapify stand-in with a fixed response delay."""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.calls = {"weather": 0, "boundaries": 0}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                kind = "weather" if self.path.startswith("/weather") else "boundaries"
+                stub.calls[kind] += 1
+                body = json.dumps(WEATHER_STUB if kind == "weather" else BOUNDARY_STUB).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+# --- Timing helpers ---
+def summarize(samples, elapsed=None):
+    ms = 1000 * np.asarray(samples)
+    summary = {
+        "count": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+    if elapsed is not None:
+        summary["rps"] = len(ms) / elapsed
+    else:
+        summary["ops_per_sec"] = 1000 / summary["mean_ms"] if summary["mean_ms"] else None
+    return summary
+
+
+def time_calls(fn, repeats, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def time_async_calls(make_call, repeats, warmup=3):
+    for i in range(warmup):
+        await make_call(i)
+    samples = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        await make_call(i)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# --- Micro-benchmarks ---
+async def run_micro(main, locations, repeats):
+    import pandas as pd
+
+    from app import model_utils
+
+    state, district = locations[0]
+    weather = await main.get_weather(state, district)
+    loc = await main.get_location_features(state, district)
+    today = datetime.now()
+    rows = [main.build_input_row(state, district, d, weather, loc, today) for d in main.DISEASES]
+    X = model_utils.assemble_features(rows)
+    registry = main.registry
+    counter = itertools.count()
+
+    results = {
+        "assemble_features": time_calls(lambda: model_utils.assemble_features(rows), repeats),
+        "prepare_input": time_calls(lambda: model_utils.prepare_input(pd.DataFrame(rows)), repeats),
+        "get_lat_long": time_calls(
+            lambda: model_utils.get_lat_long(*locations[next(counter) % len(locations)]), repeats
+        ),
+        # Warm-up visits every location once, so this times the stored-area path
+        "get_location_features": await time_async_calls(
+            lambda i: main.get_location_features(*locations[i % len(locations)]), repeats,
+            warmup=len(locations),
+        ),
+        "combined_model.predict_proba": time_calls(
+            lambda: registry.get("combined_model").predict_proba(X), repeats
+        ),
+        "cases_model.predict": time_calls(lambda: registry.get("cases_model").predict(X), repeats),
+        "deaths_model.predict": time_calls(lambda: registry.get("deaths_model").predict(X), repeats),
+    }
+    return {name: summarize(samples) for name, samples in results.items()}
+
+
+# --- Load test ---
+async def load_test(client, make_request, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    return {**summarize(latencies, elapsed), "errors": errors}
+
+
+async def run_load(main, locations, states, total, concurrency):
+    import httpx
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        scenarios = {
+            "POST /predict": lambda i: client.post(
+                "/predict",
+                json={"state_ut": locations[i % len(locations)][0], "district": locations[i % len(locations)][1]},
+            ),
+            "GET /districts/{state}": lambda i: client.get(f"/districts/{states[i % len(states)]}"),
+            "GET /weather/{state}/{district}": lambda i: client.get(
+                f"/weather/{locations[i % len(locations)][0]}/{locations[i % len(locations)][1]}"
+            ),
+        }
+        results = {}
+        for name, make_request in scenarios.items():
+            results[name] = await load_test(client, make_request, total, concurrency)
+    return results
+
+
+# --- Reporting ---
+def print_table(title, results, rate_key):
+    print(f"\n{title}")
+    print(f"{'benchmark':<34} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {rate_key:>10}")
+    for name, r in results.items():
+        rate = r.get(rate_key)
+        print(f"{name:<34} | {r['p50_ms']:>8.3f} | {r['p95_ms']:>8.3f} | {r['p99_ms']:>8.3f} | "
+              f"{rate if rate is None else f'{rate:>10.1f}'}")
+
+
+def print_comparison(previous, current):
+    print(f"\nChange in p50 vs {previous['meta'].get('commit') or previous['meta']['timestamp']}")
+    for section in ("micro", "load"):
+        for name, r in current[section].items():
+            before = previous.get(section, {}).get(name)
+            if before:
+                delta = 100 * (r["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+                print(f"{section:<5} {name:<34} {before['p50_ms']:>9.3f} -> {r['p50_ms']:>9.3f} ms ({delta:+.1f}%)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, stub):
+    os.chdir(ROOT)
+    import app.main as main
+
+    index = main.registry.get("location_index")
+    locations = list(index["locations"])[:args.locations]
+    states = sorted({state for state, _ in locations})
+
+    try:
+        micro = await run_micro(main, locations, args.repeats)
+        load = await run_load(main, locations, states, args.requests, args.concurrency)
+    finally:
+        await main.close_client()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "model": type(main.registry.get("combined_model")).__name__,
+            "args": vars(args),
+            "upstream_calls": dict(stub.calls),
+        },
+        "micro": micro,
+        "load": load,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model layer and the API in-process.")
+    parser.add_argument("--repeats", type=int, default=200, help="Calls per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per load-test scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--locations", type=int, default=50, help="Distinct districts to cycle through")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the weather and prediction caches (every request goes upstream)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare p50 latencies against")
+    args = parser.parse_args()
+
+    stub = StubUpstream(args.upstream_latency_ms)
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    # Must be set before app.main is imported
+    os.environ["WEATHER_API_URL"] = f"{stub.url}/weather"
+    os.environ["GEOAPIFY_API_URL"] = f"{stub.url}/boundaries"
+    os.environ["AREA_STORE_PATH"] = os.path.join(scratch, "district_area.sqlite3")
+    os.environ.pop("PREDICTION_CACHE_PATH", None)
+    if args.no_cache:
+        for name in ("WEATHER_CACHE_TTL", "WEATHER_CACHE_STALE_TTL", "PREDICTION_CACHE_TTL"):
+            os.environ[name] = "0"
+
+    try:
+        results = asyncio.run(run(args, stub))
+    finally:
+        stub.close()
+
+    print_table("Micro-benchmarks", results["micro"], "ops_per_sec")
+    print_table(f"Load test ({args.requests} requests, concurrency {args.concurrency})", results["load"], "rps")
+    print(f"\nUpstream calls: {results['meta']['upstream_calls']}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Parity check and latency benchmark: pickled VotingClassifier vs the NumPy fast ensemble.
+
+Run from the repository root after `python src/ensemble_export.py` (or training):
+    python benchmarks/bench_fast_ensemble.py
+
+Both paths get float32 arrays as the API assembles them. The report ends with
+the crossover: the smallest batch at which the pickle is faster, which is
+what FAST_ENSEMBLE_MAX_ROWS should sit just below.
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.fast_ensemble import FastEnsemble  # noqa: E402
+from app.feature_assembler import NamedFeatureModel  # noqa: E402
+from app.model_registry import FAST_ENSEMBLE_MAX_ROWS  # noqa: E402
+
+BATCH_SIZES = [1, 3, 10, 30, 100, 200, 300, 500, 700, 1000, 2000, 4000]
+
+
+def median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return 1000 * float(np.median(times))
+
+
+def main():
+    ensemble = joblib.load("models/combined_outbreak_model.pkl")
+    fast = FastEnsemble.load("models/combined_outbreak_model_fast.npz")
+
+    df = pd.read_csv("data/processed_data.csv")
+    X = df.drop(["Cases", "Deaths", "Outbreak"], axis=1)[fast.feature_names]
+
+    expected = ensemble.predict_proba(X)[:, 1]
+    actual = fast.predict_proba(X.to_numpy())[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agree = float(np.mean((expected >= 0.45) == (actual >= 0.45)))
+    print(f"Parity on {len(X)} rows: max |Δp| = {max_diff:.2e}, decision agreement = {agree:.4%}")
+
+    served = NamedFeatureModel(ensemble, fast.feature_names)
+    print(f"\n{'rows':>6} | {'pickle ms':>10} | {'fast ms':>8} | speedup")
+    crossover = None
+    for n in BATCH_SIZES:
+        raw = X.iloc[:n].to_numpy(dtype=np.float32)
+        repeats = 50 if n <= 100 else 10
+        pickled = median_ms(lambda: served.predict_proba(raw), repeats)
+        flat = median_ms(lambda: fast.predict_proba(raw), repeats)
+        print(f"{n:>6} | {pickled:>10.3f} | {flat:>8.3f} | {pickled / flat:6.1f}x")
+        if crossover is None and pickled < flat:
+            crossover = n
+
+    if crossover is None:
+        print(f"\nCrossover: fast ensemble wins up to {BATCH_SIZES[-1]} rows")
+    else:
+        print(f"\nCrossover: pickle is faster from {crossover} rows "
+              f"(FAST_ENSEMBLE_MAX_ROWS = {FAST_ENSEMBLE_MAX_ROWS})")
+
+    return 0 if max_diff <= 1e-6 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Load time and memory: processed_data.csv vs the memory-mapped columnar copy.
+
+Each variant runs in a fresh interpreter so import and page-cache effects do
+not leak between them. RSS is split into anonymous memory (private to each
+worker) and file-backed memory (mmapped pages shared through the page cache).
+
+Run from the repository root after preprocessing (or
+`python -m app.columnar data/processed_data.csv data/processed_columns`):
+    python benchmarks/bench_processed_data.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LOCATION_COLUMNS = ["state_ut", "district", "Latitude", "Longitude"]
+REPEATS = 5
+
+VARIANTS = {
+    "csv (all columns)": "pd.read_csv('data/processed_data.csv')",
+    "csv (location columns)": f"pd.read_csv('data/processed_data.csv', usecols={LOCATION_COLUMNS!r})",
+    "columnar mmap (all columns)": "read_columns('data/processed_columns')",
+    "columnar mmap (location columns)": f"read_columns('data/processed_columns', {LOCATION_COLUMNS!r})",
+    "columnar in-memory (all columns)": "read_columns('data/processed_columns', mmap=False)",
+}
+
+PROBE = """
+import json, time
+import pandas as pd
+from app.columnar import read_columns
+
+def rss_kb():
+    fields = {{}}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            fields[key] = int(value.split()[0]) if value.strip().endswith('kB') else None
+    return fields.get('RssAnon', 0), fields.get('RssFile', 0)
+
+anon_before, file_before = rss_kb()
+started = time.perf_counter()
+df = {expr}
+# Touch every value, as building the location index does
+df.sum(numeric_only=True)
+elapsed = time.perf_counter() - started
+anon_after, file_after = rss_kb()
+print(json.dumps({{"seconds": elapsed, "rows": len(df),
+                  "anon_kb": anon_after - anon_before, "file_kb": file_after - file_before}}))
+"""
+
+
+def run_variant(expr):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(expr=expr)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    if not os.path.exists(os.path.join(ROOT, "data/processed_columns/_schema.json")):
+        print("⚠️ data/processed_columns not found; run preprocessing or app.columnar first")
+        return 1
+
+    print(f"{'variant':<34} | {'load ms':>8} | {'anon MB':>8} | {'file MB':>8}")
+    for name, expr in VARIANTS.items():
+        runs = [run_variant(expr) for _ in range(REPEATS)]
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"{name:<34} | {1000 * best['seconds']:>8.2f} | "
+              f"{best['anon_kb'] / 1024:>8.2f} | {best['file_kb'] / 1024:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
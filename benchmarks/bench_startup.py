@@ -0,0 +1,236 @@
+"""Cold-start profile of the API: per-module import cost and time to first request.
+
+Each run starts a fresh interpreter with `python -X importtime`, imports
+app.main, runs the startup hooks and serves one request in-process, then
+reports:
+  - wall time from process spawn to import done, startup done, and first response
+  - import time per top-level package for each phase (import / startup / first request)
+  - the third-party and stdlib modules that app.* imports directly, by cumulative time
+
+Run from the repository root:
+    python benchmarks/bench_startup.py                      # eager model load, GET /ready
+    python benchmarks/bench_startup.py --mode lazy --predict
+    python benchmarks/bench_startup.py --runs 5 --compare benchmarks/results/<previous>.json
+
+Results are written as JSON to benchmarks/results/ (or --output) so runs can be compared.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench_api import RESULTS_DIR, ROOT, StubUpstream, git_commit
+
+PHASE_MARKER = "@@phase "
+PHASES = ("import", "startup", "first_request")
+
+# Runs in the child interpreter. Phase markers go straight to fd 2 so they
+# interleave correctly with the unbuffered -X importtime lines.
+CHILD = """
+import asyncio, json, os, sys, time
+def mark(phase):
+    os.write(2, ("@@phase " + phase + "\\n").encode())
+sys.path.insert(0, os.getcwd())
+mark("import")
+import app.main as main
+imported = time.time()
+mark("startup")
+import httpx
+async def serve():
+    await main.app.router.startup()
+    started = time.time()
+    mark("first_request")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup", timeout=120) as client:
+        request = json.loads(os.environ["STARTUP_REQUEST"])
+        response = await client.request(request["method"], request["path"], json=request.get("json"))
+    answered = time.time()
+    mark("done")
+    await main.app.router.shutdown()
+    return started, answered, response.status_code
+started, answered, status = asyncio.run(serve())
+print(json.dumps({"imported": imported, "started": started, "answered": answered, "status": status}))
+"""
+
+
+# --- importtime parsing ---
+def parse_importtime(stderr):
+    """Import entries per phase: module, nesting depth, self/cumulative µs and importing parent."""
+    phases = {phase: [] for phase in PHASES}
+    phase = None
+    pending = {}
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_MARKER):
+            phase = line[len(PHASE_MARKER):].strip()
+            pending = {}
+            continue
+        if phase not in phases or not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entry = {"module": name.strip(), "depth": depth, "self_us": int(self_us),
+                 "cumulative_us": int(cumulative_us), "parent": None}
+        # -X importtime prints children before their parent, one level deeper
+        for child in pending.pop(depth + 1, []):
+            child["parent"] = entry["module"]
+        pending.setdefault(depth, []).append(entry)
+        phases[phase].append(entry)
+    return phases
+
+
+def by_package(entries):
+    totals = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + entry["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def app_direct_imports(entries):
+    """Cumulative cost of each non-app module imported directly by an app.* module."""
+    found = {}
+    for entry in entries:
+        parent = entry["parent"] or ""
+        if (parent == "app" or parent.startswith("app.")) and not entry["module"].startswith("app"):
+            key = f"{parent} -> {entry['module']}"
+            found[key] = max(found.get(key, 0), entry["cumulative_us"])
+    return dict(sorted(found.items(), key=lambda item: item[1], reverse=True))
+
+
+# --- Runs ---
+def run_once(args, env):
+    spawned = time.time()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup run failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    phases = parse_importtime(proc.stderr)
+    return {
+        "import_s": result["imported"] - spawned,
+        "startup_s": result["started"] - spawned,
+        "first_request_s": result["answered"] - spawned,
+        "status": result["status"],
+        "phases": {
+            phase: {
+                "import_ms": sum(e["self_us"] for e in entries) / 1000,
+                "packages_ms": {k: v / 1000 for k, v in by_package(entries).items()},
+                "app_imports_ms": {k: v / 1000 for k, v in app_direct_imports(entries).items()},
+            }
+            for phase, entries in phases.items()
+        },
+    }
+
+
+def child_env(args, stub, scratch):
+    env = dict(os.environ)
+    env["MODEL_LOAD_MODE"] = args.mode
+    env["AREA_STORE_PATH"] = os.path.join(scratch, "district_area.sqlite3")
+    env["SNAPSHOT_STORE_PATH"] = os.path.join(scratch, "snapshots.sqlite3")
+    env["SNAPSHOT_INTERVAL"] = "0"
+    env.pop("PREDICTION_CACHE_PATH", None)
+    if stub is not None:
+        env["WEATHER_API_URL"] = f"{stub.url}/weather"
+        env["GEOAPIFY_API_URL"] = f"{stub.url}/boundaries"
+    request = {"method": "GET", "path": args.path}
+    if args.predict:
+        request = {"method": "POST", "path": "/predict",
+                   "json": {"state_ut": "Maharashtra", "district": "Pune"}}
+    env["STARTUP_REQUEST"] = json.dumps(request)
+    return env
+
+
+def merge_runs(runs):
+    """Median timings across runs; the per-module breakdown of the median first-request run."""
+    order = np.argsort([r["first_request_s"] for r in runs])
+    median_run = runs[order[len(order) // 2]]
+    return {
+        "runs": len(runs),
+        "import_s": float(np.median([r["import_s"] for r in runs])),
+        "startup_s": float(np.median([r["startup_s"] for r in runs])),
+        "first_request_s": float(np.median([r["first_request_s"] for r in runs])),
+        "status": median_run["status"],
+        "phases": median_run["phases"],
+    }
+
+
+# --- Reporting ---
+def print_report(result, top):
+    print(f"\nCold start (median of {result['runs']} runs, seconds since process spawn)")
+    print(f"  app.main imported  {result['import_s']:8.3f}")
+    print(f"  startup complete   {result['startup_s']:8.3f}")
+    print(f"  first response     {result['first_request_s']:8.3f}  (HTTP {result['status']})")
+    for phase in PHASES:
+        info = result["phases"][phase]
+        if not info["packages_ms"]:
+            continue
+        print(f"\nImports during {phase}: {info['import_ms']:.1f} ms")
+        for package, ms in list(info["packages_ms"].items())[:top]:
+            print(f"  {package:<32} {ms:9.1f} ms")
+        if info["app_imports_ms"]:
+            print("  Imported directly by app modules (cumulative):")
+            for name, ms in list(info["app_imports_ms"].items())[:top]:
+                print(f"    {name:<48} {ms:9.1f} ms")
+
+
+def print_comparison(previous, current):
+    print(f"\nChange vs {previous['meta'].get('commit') or previous['meta']['timestamp']}")
+    for key in ("import_s", "startup_s", "first_request_s"):
+        before, after = previous["result"][key], current["result"][key]
+        print(f"  {key:<16} {before:8.3f} -> {after:8.3f} s ({100 * (after - before) / before:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API cold start: module imports and time to first request.")
+    parser.add_argument("--mode", default="eager", choices=["eager", "background", "lazy"],
+                        help="MODEL_LOAD_MODE for the profiled process")
+    parser.add_argument("--path", default="/ready", help="GET path for the first request")
+    parser.add_argument("--predict", action="store_true",
+                        help="First request is POST /predict (weather/area served by a local stub)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="Rows per breakdown table")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/startup-<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    stub = StubUpstream(latency_ms=0) if args.predict else None
+    scratch = tempfile.mkdtemp(prefix="startup-")
+    try:
+        runs = [run_once(args, child_env(args, stub, scratch)) for _ in range(args.runs)]
+    finally:
+        if stub is not None:
+            stub.close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "args": vars(args),
+        },
+        "result": merge_runs(runs),
+    }
+    print_report(results["result"], args.top)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
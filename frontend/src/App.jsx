@@ -61,7 +61,7 @@ function App() {
     
     try {
       const response = await Promise.race([
-        axios.get(`${API_URL}/states`, { 
+        axios.get(`${API_URL}/ready`, { 
           timeout: 3000,
           validateStatus: function (status) {
             return status < 500;
@@ -104,7 +104,7 @@ function App() {
     for (let retry = 0; retry < maxRetries; retry++) {
       try {
         const response = await Promise.race([
-          axios.get(`${API_URL}/states`, { 
+          axios.get(`${API_URL}/ready`, { 
             timeout: 1500, // Short timeout per retry
             validateStatus: (status) => status < 500 
           }),
@@ -852,13 +852,15 @@ function App() {
     setPredictions([]);
     
     try {
-      const res = await axios.post(`${API_URL}/predict`, {
-        state_ut: state,
-        district: district,
-      }, { timeout: 15000 });
+      // Compact GET: shared context sent once, and the browser revalidates with If-None-Match (304)
+      const res = await axios.get(`${API_URL}/predict`, {
+        params: { state_ut: state, district: district, view: 'compact' },
+        timeout: 15000,
+      });
       
       if (isMountedRef.current && !recoveryMode && !quickRecoveryCheck && !cycleLimitReachedRef.current) {
-        setPredictions(res.data.predictions || []);
+        const { context = {}, predictions: entries = [] } = res.data;
+        setPredictions(entries.map((entry) => ({ ...context, ...entry })));
       }
     } catch (err) {
       if (isMountedRef.current && !recoveryMode && !quickRecoveryCheck && !cycleLimitReachedRef.current) {
@@ -1,7 +1,45 @@
+import argparse
+import hashlib
 import pandas as pd
+import numpy as np
 from sklearn.preprocessing import LabelEncoder
 import joblib
 import os
+import sys
+
+# The columnar reader lives with the serving code; src/ scripts run from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.columnar import ColumnarWriter, is_current, load_processed_data, read_schema, write_columns  # noqa: E402
+from app.label_encoding import StableLabelEncoder  # noqa: E402
+
+PROCESSED_CSV = '../data/processed_data.csv'
+# Memory-mappable copy read by training and serving instead of the CSV
+PROCESSED_COLUMNS = '../data/processed_columns'
+# Encoded rows from the latest `--append`, read by `train_model.py update`
+INCREMENT_CSV = '../data/increment.csv'
+
+CATEGORICAL_COLS = ['week_of_outbreak', 'state_ut', 'district', 'Disease']
+MEAN_FILL_COLS = ['preci', 'LAI', 'Temp']
+
+# Compact dtypes for the chunked pipeline (codes fit in int16: < 32k categories)
+CHUNKED_DTYPES = {
+    'week_of_outbreak': np.int16,
+    'state_ut': np.int16,
+    'district': np.int16,
+    'Disease': np.int16,
+    'Cases': np.float32,
+    'Deaths': np.float32,
+    'day': np.int16,
+    'mon': np.int16,
+    'year': np.int16,
+    'Latitude': np.float32,
+    'Longitude': np.float32,
+    'preci': np.float32,
+    'LAI': np.float32,
+    'Temp': np.float32,
+    'Outbreak': np.int8,
+}
+
 
 def preprocess_data(input_path='../data/Final_data.csv', save_encoders=True):
     # Load data
@@ -26,7 +64,7 @@ def preprocess_data(input_path='../data/Final_data.csv', save_encoders=True):
     # Encode categorical columns
     label_encoders = {}
     categorical_cols = ['week_of_outbreak', 'state_ut', 'district', 'Disease']
-    
+
     for col in categorical_cols:
         le = LabelEncoder()
         df[col] = le.fit_transform(df[col])
@@ -38,6 +76,215 @@ def preprocess_data(input_path='../data/Final_data.csv', save_encoders=True):
         joblib.dump(label_encoders, '../models/label_encoders.pkl')
 
     # Save processed data (optional)
-    df.to_csv('../data/processed_data.csv', index=False)
+    df.to_csv(PROCESSED_CSV, index=False)
+    write_columns(df, PROCESSED_COLUMNS)
 
     return df
+
+
+def _read_chunks(input_path, chunksize):
+    for chunk in pd.read_csv(input_path, chunksize=chunksize):
+        if 'Unnamed: 0' in chunk.columns:
+            chunk = chunk.drop(columns=['Unnamed: 0'])
+        for col in ['Cases'] + MEAN_FILL_COLS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        yield chunk
+
+
+def scan_statistics(input_path, chunksize=100_000):
+    """First pass: fill-value means and category vocabularies, in bounded memory."""
+    sums = dict.fromkeys(MEAN_FILL_COLS, 0.0)
+    counts = dict.fromkeys(MEAN_FILL_COLS, 0)
+    vocab = {col: set() for col in CATEGORICAL_COLS}
+    rows = 0
+
+    for chunk in _read_chunks(input_path, chunksize):
+        rows += len(chunk)
+        for col in MEAN_FILL_COLS:
+            values = chunk[col]
+            sums[col] += float(values.sum())
+            counts[col] += int(values.count())
+        for col in CATEGORICAL_COLS:
+            vocab[col].update(chunk[col].dropna().unique())
+
+    means = {col: sums[col] / counts[col] if counts[col] else 0.0 for col in MEAN_FILL_COLS}
+    return means, vocab, rows
+
+
+def fit_encoders_from_vocab(vocab):
+    """LabelEncoders equivalent to fit() on the full column (classes_ sorted)."""
+    label_encoders = {}
+    for col in CATEGORICAL_COLS:
+        le = LabelEncoder()
+        le.fit(np.array(sorted(vocab[col]), dtype=object))
+        label_encoders[col] = le
+    return label_encoders
+
+
+def encode_chunk(chunk, means, code_maps):
+    """Clean and encode one chunk with precomputed means and label codes."""
+    chunk['Deaths'] = chunk['Deaths'].fillna(0)
+    for col in MEAN_FILL_COLS:
+        chunk[col] = chunk[col].fillna(means[col])
+    chunk['Outbreak'] = chunk['Cases'] > 50
+    for col in CATEGORICAL_COLS:
+        chunk[col] = chunk[col].map(code_maps[col])
+    return chunk[list(CHUNKED_DTYPES)].astype(CHUNKED_DTYPES)
+
+
+def preprocess_data_chunked(input_path='../data/Final_data.csv',
+                            output_path=PROCESSED_CSV, columnar_path=PROCESSED_COLUMNS,
+                            chunksize=100_000, save_encoders=True):
+    """Streaming two-pass variant of preprocess_data for inputs larger than memory.
+
+    Pass 1 computes the fill-value means and category vocabularies; pass 2
+    encodes each chunk and appends it to `output_path` and to the columnar
+    artifact at `columnar_path`. Only one chunk is held in memory at a time,
+    with int16 codes and float32 features.
+    Returns (label_encoders, rows_written).
+    """
+    means, vocab, rows = scan_statistics(input_path, chunksize)
+    label_encoders = fit_encoders_from_vocab(vocab)
+    code_maps = {
+        col: {label: code for code, label in enumerate(le.classes_)}
+        for col, le in label_encoders.items()
+    }
+
+    if save_encoders:
+        os.makedirs('../models', exist_ok=True)
+        joblib.dump(label_encoders, '../models/label_encoders.pkl')
+
+    rows_written = 0
+    tmp_path = output_path + '.tmp'
+    columns = ColumnarWriter(columnar_path, CHUNKED_DTYPES, rows)
+    for i, chunk in enumerate(_read_chunks(input_path, chunksize)):
+        encoded = encode_chunk(chunk, means, code_maps)
+        encoded.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        columns.write(encoded)
+        rows_written += len(encoded)
+    # Only replace the previous outputs once they are completely written.
+    # The columnar copy goes last so it is never older than the CSV.
+    os.replace(tmp_path, output_path)
+    columns.close()
+
+    return label_encoders, rows_written
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def rows_digest(raw):
+    """Order-independent hash of raw rows, so a re-exported copy of a batch still matches.
+
+    Hashed before mean filling, which depends on the history it is appended to.
+    """
+    raw = raw[sorted(raw.columns)]
+    row_hashes = np.sort(pd.util.hash_pandas_object(raw, index=False).to_numpy())
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def ingested_increments(columnar_path, processed_csv):
+    """Increments recorded in the columnar artifact's schema (empty after a full preprocess)."""
+    if not is_current(columnar_path, processed_csv):
+        print(f"⚠️ {columnar_path} is missing or stale; cannot check for repeated increments")
+        return []
+    return read_schema(columnar_path).get('ingested', [])
+
+
+def preprocess_increment(new_path, processed_csv=PROCESSED_CSV, columnar_path=PROCESSED_COLUMNS,
+                         increment_path=INCREMENT_CSV, encoders_path='../models/label_encoders.pkl'):
+    """Append a new batch of raw rows (e.g. one week) to the processed data without refitting.
+
+    Encoders are extended in place: existing codes never change and unseen
+    labels get the next free codes. Missing values are filled with the
+    history's means (the mean of a mean-filled column is unchanged). The new
+    encoded rows are also written to `increment_path` for warm-start training.
+    Each append is recorded in the columnar schema (file hash, row digest,
+    date range); a batch whose file or rows were already appended is
+    rejected with ValueError before anything is written.
+    Returns (encoded_rows, added_labels).
+    """
+    label_encoders = {
+        col: StableLabelEncoder.from_encoder(le) for col, le in joblib.load(encoders_path).items()
+    }
+    ingested = ingested_increments(columnar_path, processed_csv)
+    file_hash = file_sha256(new_path)
+    for entry in ingested:
+        if entry['sha256'] == file_hash:
+            raise ValueError(f"{new_path} was already appended on {entry['appended_at']}")
+    existing = load_processed_data(processed_csv, columnar_path)
+    means = {col: float(existing[col].mean()) for col in MEAN_FILL_COLS}
+
+    new = pd.concat(_read_chunks(new_path, 100_000), ignore_index=True)
+    digest = rows_digest(new)
+    for entry in ingested:
+        if entry['rows_digest'] == digest:
+            raise ValueError(f"{new_path} holds the same rows as {entry['source']}, "
+                             f"appended on {entry['appended_at']}")
+    added = {col: label_encoders[col].extend(new[col].dropna().unique()) for col in CATEGORICAL_COLS}
+    code_maps = {
+        col: {label: code for code, label in enumerate(le.classes_)}
+        for col, le in label_encoders.items()
+    }
+    encoded = encode_chunk(new, means, code_maps)[list(existing.columns)]
+    dates = pd.to_datetime(
+        pd.DataFrame({'year': encoded['year'], 'month': encoded['mon'], 'day': encoded['day']}),
+        errors='coerce',
+    )
+    ingested.append({
+        'source': os.path.basename(new_path),
+        'sha256': file_hash,
+        'rows_digest': digest,
+        'rows': len(encoded),
+        'first_date': None if dates.isna().all() else dates.min().date().isoformat(),
+        'last_date': None if dates.isna().all() else dates.max().date().isoformat(),
+        'appended_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+    })
+
+    # Encoders first, so stored data never refers to a code they do not know
+    joblib.dump(label_encoders, encoders_path)
+    encoded.to_csv(increment_path, index=False)
+    encoded.to_csv(processed_csv, mode='a', header=False, index=False)
+
+    # Rewrite the columnar copy last so it is not older than the CSV
+    columns = ColumnarWriter(columnar_path, existing.dtypes.to_dict(), len(existing) + len(encoded),
+                             metadata={'ingested': ingested})
+    columns.write(existing)
+    columns.write(encoded)
+    columns.close()
+
+    return encoded, added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess the outbreak dataset.")
+    parser.add_argument('--input', default='../data/Final_data.csv')
+    parser.add_argument('--chunked', action='store_true',
+                        help="Stream the input in chunks with bounded memory and compact dtypes")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--append', metavar='NEW_CSV',
+                        help="Append new raw rows to the processed data, keeping existing label codes")
+    args = parser.parse_args()
+
+    if args.append:
+        try:
+            encoded, added = preprocess_increment(args.append)
+        except ValueError as e:
+            print(f"⚠️ Not appended: {e}")
+            sys.exit(1)
+        print(f"✅ Appended {len(encoded)} rows; increment saved to {INCREMENT_CSV}")
+        for col, labels in added.items():
+            if labels:
+                print(f"🆕 {col}: {len(labels)} new labels ({', '.join(map(str, labels[:5]))}"
+                      f"{', ...' if len(labels) > 5 else ''})")
+    elif args.chunked:
+        _, rows = preprocess_data_chunked(args.input, chunksize=args.chunksize)
+        print(f"✅ Preprocessed {rows} rows in chunks of {args.chunksize}")
+    else:
+        df = preprocess_data(args.input)
+        print(f"✅ Preprocessed {len(df)} rows")
@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+# The evaluator lives with the serving code; src/ scripts run from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.columnar import load_processed_data  # noqa: E402
+from app.fast_ensemble import FAST_ENSEMBLE_FORMAT, FastEnsemble  # noqa: E402
+
+FAST_ENSEMBLE_FILE = '../models/combined_outbreak_model_fast.npz'
+PARITY_TOLERANCE = 1e-6
+
+
+def _flatten_catboost(model):
+    """Oblivious trees as (features, borders, leaves) arrays padded to the max depth."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catboost.json')
+        model.save_model(path, format='json')
+        with open(path) as f:
+            dump = json.load(f)
+
+    trees = dump['oblivious_trees']
+    depth = max(len(tree['splits']) for tree in trees)
+    features = np.zeros((len(trees), depth), dtype=np.int32)
+    # +inf borders never fire, so padded levels always take bit 0
+    borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    leaves = np.zeros((len(trees), 2 ** depth), dtype=np.float64)
+
+    for t, tree in enumerate(trees):
+        for level, split in enumerate(tree['splits']):
+            if split.get('split_type', 'FloatFeature') != 'FloatFeature':
+                raise ValueError(f"Unsupported CatBoost split type: {split['split_type']}")
+            features[t, level] = split['float_feature_index']
+            borders[t, level] = split['border']
+        values = tree['leaf_values']
+        leaves[t, :len(values)] = values
+
+    scale, bias = dump['scale_and_bias']
+    bias = bias[0] if isinstance(bias, list) else bias
+    return {
+        'cb_features': features,
+        'cb_borders': borders,
+        'cb_leaves': leaves,
+        'cb_scale': np.float64(scale),
+        'cb_bias': np.float64(bias),
+    }
+
+
+def _flatten_forest(forest):
+    """sklearn trees padded to one node count; leaves loop back to themselves."""
+    trees = [est.tree_ for est in forest.estimators_]
+    n_nodes = max(tree.node_count for tree in trees)
+    shape = (len(trees), n_nodes)
+
+    left = np.tile(np.arange(n_nodes, dtype=np.int32), (len(trees), 1))
+    right = left.copy()
+    feature = np.zeros(shape, dtype=np.int32)
+    threshold = np.full(shape, np.inf)
+    value = np.zeros(shape)
+
+    for t, tree in enumerate(trees):
+        n = tree.node_count
+        is_split = tree.children_left[:n] != -1
+        nodes = np.arange(n)
+        left[t, :n] = np.where(is_split, tree.children_left[:n], nodes)
+        right[t, :n] = np.where(is_split, tree.children_right[:n], nodes)
+        feature[t, :n] = np.where(is_split, tree.feature[:n], 0)
+        threshold[t, :n] = np.where(is_split, tree.threshold[:n], np.inf)
+        counts = tree.value[:n, 0, :]
+        value[t, :n] = counts[:, 1] / counts.sum(axis=1)
+
+    return {
+        'rf_left': left,
+        'rf_right': right,
+        'rf_feature': feature,
+        'rf_threshold': threshold,
+        'rf_value': value,
+        'rf_depth': np.int32(max(tree.max_depth for tree in trees)),
+    }
+
+
+def flatten_ensemble(ensemble, feature_names):
+    """The voting ensemble as the flat NumPy tree arrays FastEnsemble reads."""
+    catboost_clf = ensemble.named_estimators_['catboost']
+    rf_clf = ensemble.named_estimators_['random_forest']
+
+    weights = np.ones(2) if ensemble.weights is None else np.asarray(ensemble.weights, dtype=float)
+    return {
+        'format_version': np.int32(FAST_ENSEMBLE_FORMAT),
+        'feature_names': np.array([str(c) for c in feature_names]),
+        'weights': weights / weights.sum(),
+        **_flatten_catboost(catboost_clf),
+        **_flatten_forest(rf_clf),
+    }
+
+
+def export_fast_ensemble(ensemble, X_check, path=FAST_ENSEMBLE_FILE):
+    """Write the voting ensemble as flat NumPy tree arrays and verify parity on X_check."""
+    arrays = flatten_ensemble(ensemble, X_check.columns)
+
+    expected = ensemble.predict_proba(X_check)[:, 1]
+    actual = FastEnsemble(arrays).predict_proba(X_check.to_numpy())[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > PARITY_TOLERANCE:
+        raise ValueError(f"Fast ensemble deviates from predict_proba by {max_diff:.2e}")
+
+    np.savez(path, **arrays)
+    print(f"⚡ Saved: {os.path.basename(path)} (max |Δp| = {max_diff:.2e} on {len(X_check)} rows)")
+    return max_diff
+
+
+def main():
+    """Export the already-trained combined model without retraining."""
+    ensemble = joblib.load('../models/combined_outbreak_model.pkl')
+    df = load_processed_data('../data/processed_data.csv', '../data/processed_columns')
+    X = df.drop(['Cases', 'Deaths', 'Outbreak'], axis=1)
+    export_fast_ensemble(ensemble, X)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless: plots are written to files, never shown
+import matplotlib.pyplot as plt
+
+# The data loader lives with the serving code; src/ scripts run from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.columnar import load_processed_data  # noqa: E402
+
+THRESHOLDS_FILE = '../models/thresholds.json'
+# Processed-data rows the classifier was held out on, written by a full training run
+HOLDOUT_FILE = '../models/outbreak_holdout.npz'
+THRESHOLDS_FORMAT = 1
+PLOT_FILE = '../reports/precision_recall.png'
+
+# Diseases with fewer held-out positives than this use the global threshold
+MIN_POSITIVES = 25
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+
+
+def threshold_curve(y_true, y_score):
+    """Precision, recall and F1 at every distinct score, in one sorted cumulative pass.
+
+    A row is predicted positive when its score is >= the threshold. Thresholds
+    are returned in descending order.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_score = np.asarray(y_score, dtype=np.float64)
+
+    order = np.argsort(-y_score, kind='mergesort')
+    scores = y_score[order]
+    tp = np.cumsum(y_true[order])
+    fp = np.arange(1, len(scores) + 1) - tp
+
+    # Keep the last row of each run of equal scores: ties switch together
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp, fp, thresholds = tp[last], fp[last], scores[last]
+    positives = int(y_true.sum())
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        f1 = np.where(tp + fp + positives > 0, 2 * tp / (tp + fp + positives), 0.0)
+
+    return {'thresholds': thresholds, 'precision': precision, 'recall': recall,
+            'f1': f1, 'tp': tp, 'fp': fp, 'positives': positives}
+
+
+def best_threshold(curve):
+    """Index and value of the F1-maximizing threshold (the highest one on ties)."""
+    i = int(np.argmax(curve['f1']))
+    return i, float(curve['thresholds'][i])
+
+
+def bootstrap_ci(y_true, y_score, threshold, samples=BOOTSTRAP_SAMPLES,
+                 confidence=CONFIDENCE, seed=42, block=200):
+    """Percentile bootstrap intervals for precision, recall and F1 at a fixed threshold.
+
+    Each resample is a multinomial count vector over the rows, so a block of
+    resamples is scored with two matrix-vector products.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    predicted = (np.asarray(y_score) >= threshold).astype(np.float64)
+    hit = predicted * y_true
+    n = len(y_true)
+    rng = np.random.default_rng(seed)
+
+    tp, pred_pos, actual_pos = [], [], []
+    for start in range(0, samples, block):
+        weights = rng.multinomial(n, np.full(n, 1.0 / n), size=min(block, samples - start))
+        tp.append(weights @ hit)
+        pred_pos.append(weights @ predicted)
+        actual_pos.append(weights @ y_true)
+    tp, pred_pos, actual_pos = map(np.concatenate, (tp, pred_pos, actual_pos))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'precision': np.where(pred_pos > 0, tp / pred_pos, 0.0),
+            'recall': np.where(actual_pos > 0, tp / actual_pos, 0.0),
+            'f1': np.where(pred_pos + actual_pos > 0, 2 * tp / (pred_pos + actual_pos), 0.0),
+        }
+    tail = 100 * (1 - confidence) / 2
+    return {name: [float(np.percentile(v, tail)), float(np.percentile(v, 100 - tail))]
+            for name, v in metrics.items()}
+
+
+def summarize(y_true, y_score):
+    """Best threshold with its metrics and bootstrap intervals."""
+    curve = threshold_curve(y_true, y_score)
+    i, threshold = best_threshold(curve)
+    return {
+        'threshold': threshold,
+        'f1': float(curve['f1'][i]),
+        'precision': float(curve['precision'][i]),
+        'recall': float(curve['recall'][i]),
+        'ci': bootstrap_ci(y_true, y_score, threshold),
+        'support': int(len(y_true)),
+        'positives': curve['positives'],
+    }, curve
+
+
+def choose_thresholds(y_true, y_score, disease_codes, disease_names):
+    """Global threshold plus per-disease thresholds where there is enough held-out support."""
+    y_true = np.asarray(y_true)
+    y_score = np.asarray(y_score)
+    disease_codes = np.asarray(disease_codes)
+
+    default, curve = summarize(y_true, y_score)
+    per_disease = {}
+    for code in np.unique(disease_codes):
+        mask = disease_codes == code
+        if y_true[mask].sum() < MIN_POSITIVES:
+            continue
+        per_disease[str(disease_names[code])], _ = summarize(y_true[mask], y_score[mask])
+
+    return {
+        'format_version': THRESHOLDS_FORMAT,
+        'default': default,
+        'per_disease': per_disease,
+        'bootstrap': {'samples': BOOTSTRAP_SAMPLES, 'confidence': CONFIDENCE,
+                      'min_positives': MIN_POSITIVES},
+    }, curve
+
+
+def save_thresholds(thresholds, path=THRESHOLDS_FILE):
+    with open(path, 'w') as f:
+        json.dump(thresholds, f, indent=2)
+    print(f"🎯 Saved: {os.path.basename(path)}")
+
+
+def print_thresholds(thresholds):
+    def line(name, s):
+        lo, hi = s['ci']['f1']
+        return (f"{name:<28} threshold {s['threshold']:.3f} | F1 {s['f1']:.4f} "
+                f"[{lo:.4f}, {hi:.4f}] | P {s['precision']:.4f} | R {s['recall']:.4f} "
+                f"| {s['positives']}/{s['support']} positive")
+
+    print(f"\n🎯 F1-optimal thresholds ({int(CONFIDENCE * 100)}% bootstrap CI):")
+    print(line('(all diseases)', thresholds['default']))
+    for name, s in thresholds['per_disease'].items():
+        print(line(name, s))
+
+
+def plot_precision_recall(curve, thresholds, path=PLOT_FILE):
+    best = thresholds['default']['threshold']
+    plt.figure(figsize=(8, 5))
+    plt.plot(curve['thresholds'], curve['precision'], label='Precision')
+    plt.plot(curve['thresholds'], curve['recall'], label='Recall')
+    plt.plot(curve['thresholds'], curve['f1'], label='F1', alpha=0.7)
+    plt.axvline(x=best, color='r', linestyle='--', label=f'Best Threshold = {best:.2f}')
+    for name, s in thresholds['per_disease'].items():
+        plt.axvline(x=s['threshold'], color='gray', linestyle=':', alpha=0.6)
+        plt.text(s['threshold'], 0.02, name, rotation=90, fontsize=7, color='gray')
+    plt.xlabel('Threshold')
+    plt.ylabel('Score')
+    plt.title('Precision vs Recall Tradeoff')
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    plt.savefig(path, dpi=120)
+    plt.close()
+    print(f"📈 Saved: {path}")
+
+
+def evaluate_classifier(model, X_test, y_test, disease_names):
+    """Choose, save and plot thresholds for a fitted outbreak classifier."""
+    y_proba = model.predict_proba(X_test)[:, 1]
+    thresholds, curve = choose_thresholds(y_test, y_proba, X_test['Disease'], disease_names)
+    print_thresholds(thresholds)
+    save_thresholds(thresholds)
+    plot_precision_recall(curve, thresholds)
+    return thresholds
+
+
+def save_holdout(X_test, y_test, path=HOLDOUT_FILE):
+    """Record which processed rows the classifier was not trained on.
+
+    `--append` only adds rows at the end of the processed data and
+    `train_model.py update` fits only those new rows, so these positions
+    stay a true held-out set across incremental updates.
+    """
+    np.savez(path, rows=X_test.index.to_numpy(dtype=np.int64), outbreak=np.asarray(y_test, dtype=np.int8))
+    print(f"💾 Saved: {os.path.basename(path)}")
+
+
+def load_holdout(df, path=HOLDOUT_FILE):
+    """(X_test, y_test) for the rows saved by the last full training run."""
+    if not os.path.exists(path):
+        sys.exit(f"❌ {path} not found; run a full `python train_model.py` to record the held-out rows")
+    saved = np.load(path)
+    rows = saved['rows']
+    # The stored labels catch processed data that was regenerated rather than appended to
+    if rows.max(initial=-1) >= len(df) or not np.array_equal(df['Outbreak'].to_numpy()[rows], saved['outbreak']):
+        sys.exit("❌ Processed data no longer matches the saved held-out rows; "
+                 "retrain with `python train_model.py`")
+    held_out = df.iloc[rows]
+    return held_out.drop(['Cases', 'Deaths', 'Outbreak'], axis=1), held_out['Outbreak']
+
+
+def main():
+    """Re-evaluate the saved classifier on the held-out rows of the last full training run."""
+    model = joblib.load('../models/combined_outbreak_model.pkl')
+    disease_names = joblib.load('../models/label_encoders.pkl')['Disease'].classes_
+    df = load_processed_data('../data/processed_data.csv', '../data/processed_columns')
+
+    X_test, y_test = load_holdout(df)
+    evaluate_classifier(model, X_test, y_test, disease_names)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,53 @@
+import argparse
+import hashlib
+import json
 import os
+import time
 import joblib
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
 from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
 from sklearn.ensemble import VotingClassifier, RandomForestClassifier
 from sklearn.metrics import (
-    accuracy_score, classification_report, mean_absolute_error,
-    mean_squared_error, precision_recall_curve, f1_score
+    accuracy_score, classification_report, mean_absolute_error, mean_squared_error
 )
 
 from catboost import CatBoostClassifier
 from xgboost import XGBRegressor
 
+from ensemble_export import export_fast_ensemble  # also puts the repo root on sys.path
+from evaluation import evaluate_classifier, save_holdout
+from app.columnar import load_processed_data
+
 FEATURE_ORDER_FILE = '../models/feature_order.npy'
+PROCESSED_CSV = '../data/processed_data.csv'
+PROCESSED_COLUMNS = '../data/processed_columns'
+STAGE_CACHE_DIR = '../models/.cache'
+# Written by `python train_model.py tune`; overrides the defaults below when present
+BEST_PARAMS_FILE = '../models/best_params.json'
+# Encoded new rows written by `python data_preprocessing.py --append`
+INCREMENT_CSV = '../data/increment.csv'
+
+# Bump when a stage's training code changes so cached stages are not reused
+STAGE_CACHE_VERSION = 1
+
+# Total threads shared by the stages that train concurrently
+TRAIN_THREADS = int(os.getenv('TRAIN_THREADS', os.cpu_count() or 1))
+
+# --- Warm-start updates ---
+UPDATE_ROUNDS = 50  # extra boosting rounds for CatBoost / XGBoost
+UPDATE_TREES = 10   # extra RandomForest trees, fitted on the new rows only
+MIN_UPDATE_ROWS = 20
+
+# --- Default hyperparameters (part of each stage's cache key) ---
+CATBOOST_PARAMS = dict(iterations=200, learning_rate=0.05, depth=6, verbose=0, loss_function='Logloss')
+RF_PARAMS = dict(n_estimators=150, max_depth=10, random_state=42, class_weight='balanced')
+CASES_PARAMS = dict(max_depth=5, n_estimators=150, learning_rate=0.05)
+DEATHS_PARAMS = dict()
 
 
 def save_feature_order(columns):
@@ -22,7 +55,7 @@ def save_feature_order(columns):
 
 
 def load_data_and_features():
-    df = pd.read_csv('../data/processed_data.csv')
+    df = load_processed_data(PROCESSED_CSV, PROCESSED_COLUMNS, mmap=False)
 
     # Save the order of input features (used later during inference)
     feature_cols = df.drop(['Cases', 'Deaths', 'Outbreak'], axis=1).columns
@@ -30,95 +63,125 @@ def load_data_and_features():
     return df
 
 
-def train_outbreak_classifier(df):
-    print("🚀 Training combined CatBoost + RandomForest classifier")
+def frame_hash(df):
+    """Content hash of the training frame (values, column names and dtypes)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([(c, str(t)) for c, t in df.dtypes.items()]).encode())
+    return digest.hexdigest()
 
-    X = df.drop(['Cases', 'Deaths', 'Outbreak'], axis=1)
-    y = df['Outbreak']
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+def stage_key(stage, data_hash, params):
+    payload = json.dumps([STAGE_CACHE_VERSION, stage, data_hash, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def stage_cache_path(stage, key):
+    return os.path.join(STAGE_CACHE_DIR, f'{stage}-{key}.pkl')
+
 
+def load_cached_stage(stage, key):
+    path = stage_cache_path(stage, key)
+    if os.path.exists(path):
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable stage cache {path}: {e}")
+    return None
+
+
+def save_cached_stage(stage, key, result):
+    os.makedirs(STAGE_CACHE_DIR, exist_ok=True)
+    path = stage_cache_path(stage, key)
+    joblib.dump(result, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def outbreak_xy(df):
+    return df.drop(['Cases', 'Deaths', 'Outbreak'], axis=1), df['Outbreak']
+
+
+def cases_xy(df):
+    df_outbreaks = df[df['Outbreak'] == 1].copy()
+    df_outbreaks = df_outbreaks[df_outbreaks['Cases'] > 0]
+    df_outbreaks['Cases'] = np.log1p(df_outbreaks['Cases'])
+    return df_outbreaks.drop(['Cases', 'Deaths', 'Outbreak'], axis=1), df_outbreaks['Cases']
+
+
+def deaths_xy(df):
+    df_outbreaks = df[df['Outbreak'] == 1]
+    return df_outbreaks.drop(['Cases', 'Deaths', 'Outbreak'], axis=1), df_outbreaks['Deaths']
+
+
+def build_outbreak_classifier(params, threads, y_train):
     catboost_clf = CatBoostClassifier(
-        iterations=200,
-        learning_rate=0.05,
-        depth=6,
-        verbose=0,
-        loss_function='Logloss',
+        **params['catboost'],
+        thread_count=threads,
         class_weights=[1, float(np.bincount(y_train)[0]) / np.bincount(y_train)[1]]
     )
+    rf_clf = RandomForestClassifier(**params['random_forest'], n_jobs=threads)
 
-    rf_clf = RandomForestClassifier(
-        n_estimators=150,
-        max_depth=10,
-        random_state=42,
-        class_weight='balanced'
-    )
-
-    ensemble = VotingClassifier(
+    return VotingClassifier(
         estimators=[('catboost', catboost_clf), ('random_forest', rf_clf)],
         voting='soft'
     )
 
-    ensemble.fit(X_train, y_train)
+
+def build_regressor(params, threads, y_train):
+    return XGBRegressor(**params, n_jobs=threads)
+
+
+def release_threads(model):
+    """Drop training-time thread counts; serving decides its own parallelism."""
+    if isinstance(model, VotingClassifier):
+        model.named_estimators_['random_forest'].set_params(n_jobs=None)
+    else:
+        model.set_params(n_jobs=None)
+    return model
+
+
+def split_stage(stage, X, y):
+    """The held-out split used for evaluation (stratified for the classifier)."""
+    stratify = y if stage == 'outbreak_classifier' else None
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=stratify)
+
+
+def fit_stage(stage, df, params, threads):
+    select, build = STAGE_MODELS[stage]
+    X, y = select(df)
+    X_train, X_test, y_train, y_test = split_stage(stage, X, y)
+
+    model = build(params, threads, y_train)
+    model.fit(X_train, y_train)
+    return {'model': release_threads(model), 'X_test': X_test, 'y_test': y_test}
+
+
+def report_outbreak_classifier(result):
+    ensemble, X_test, y_test = result['model'], result['X_test'], result['y_test']
 
     y_pred = ensemble.predict(X_test)
     print("\n🔍 Combined Model Performance @ Default Threshold (0.5)")
     print(f"✅ Accuracy: {accuracy_score(y_test, y_pred):.4f}")
     print("📝 Classification Report:\n", classification_report(y_test, y_pred))
 
-    y_proba = ensemble.predict_proba(X_test)[:, 1]
-    thresholds = np.arange(0.2, 0.6, 0.05)
-    best_f1 = 0
-    best_threshold = 0.5
-
-    print("\n🔎 Evaluating performance at various thresholds:")
-    for threshold in thresholds:
-        y_pred_thresh = (y_proba >= threshold).astype(int)
-        f1 = f1_score(y_test, y_pred_thresh)
-        print(f"Threshold: {threshold:.2f} | F1-Score: {f1:.4f}")
-        if f1 > best_f1:
-            best_f1 = f1
-            best_threshold = threshold
-
-    y_best_pred = (y_proba >= best_threshold).astype(int)
-    print(f"\n🎯 Best Threshold based on F1: {best_threshold:.2f}")
+    # Global and per-disease thresholds, saved for serving
+    disease_names = joblib.load('../models/label_encoders.pkl')['Disease'].classes_
+    thresholds = evaluate_classifier(ensemble, X_test, y_test, disease_names)
+
+    best_threshold = thresholds['default']['threshold']
+    y_best_pred = (ensemble.predict_proba(X_test)[:, 1] >= best_threshold).astype(int)
     print(f"📝 Classification Report @ Best Threshold ({best_threshold:.2f}):\n",
           classification_report(y_test, y_best_pred))
 
-    precision, recall, pr_thresholds = precision_recall_curve(y_test, y_proba)
-    plt.figure(figsize=(8, 5))
-    plt.plot(pr_thresholds, precision[:-1], label='Precision')
-    plt.plot(pr_thresholds, recall[:-1], label='Recall')
-    plt.axvline(x=best_threshold, color='r', linestyle='--', label=f'Best Threshold = {best_threshold:.2f}')
-    plt.xlabel('Threshold')
-    plt.ylabel('Score')
-    plt.title('Precision vs Recall Tradeoff')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
-
     joblib.dump(ensemble, '../models/combined_outbreak_model.pkl')
     print("💾 Saved: combined_outbreak_model.pkl")
+    save_holdout(X_test, y_test)
 
+    # Flattened NumPy copy of the ensemble for low-latency serving
+    export_fast_ensemble(ensemble, X_test)
 
-def train_cases_regressor(df):
-    print("\n🔧 Training Cases Regressor...")
-    df_outbreaks = df[df['Outbreak'] == 1].copy()
-    df_outbreaks = df_outbreaks[df_outbreaks['Cases'] > 0]
-    df_outbreaks['Cases'] = np.log1p(df_outbreaks['Cases'])
-
-    X = df_outbreaks.drop(['Cases', 'Deaths', 'Outbreak'], axis=1)
-    y = df_outbreaks['Cases']
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
 
-    model = XGBRegressor(max_depth=5, n_estimators=150, learning_rate=0.05)
-    model.fit(X_train, y_train)
+def report_cases_regressor(result):
+    model, X_test, y_test = result['model'], result['X_test'], result['y_test']
 
     y_pred_log = model.predict(X_test)
     y_pred = np.expm1(y_pred_log)
@@ -132,19 +195,8 @@ def train_cases_regressor(df):
     print("✅ Saved: xgb_cases_model.pkl")
 
 
-def train_deaths_regressor(df):
-    print("\n🔧 Training Deaths Regressor...")
-    df_outbreaks = df[df['Outbreak'] == 1]
-
-    X = df_outbreaks.drop(['Cases', 'Deaths', 'Outbreak'], axis=1)
-    y = df_outbreaks['Deaths']
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-
-    model = XGBRegressor()
-    model.fit(X_train, y_train)
+def report_deaths_regressor(result):
+    model, X_test, y_test = result['model'], result['X_test'], result['y_test']
 
     y_pred = model.predict(X_test)
 
@@ -156,17 +208,185 @@ def train_deaths_regressor(df):
     print("✅ Saved: xgb_deaths_model.pkl")
 
 
-def main():
+# stage name -> (select X/y from the processed frame, build the unfitted model)
+STAGE_MODELS = {
+    'outbreak_classifier': (outbreak_xy, build_outbreak_classifier),
+    'cases_regressor': (cases_xy, build_regressor),
+    'deaths_regressor': (deaths_xy, build_regressor),
+}
+
+# stage name -> evaluate + save in the parent process
+STAGE_REPORTS = {
+    'outbreak_classifier': report_outbreak_classifier,
+    'cases_regressor': report_cases_regressor,
+    'deaths_regressor': report_deaths_regressor,
+}
+
+
+def default_params():
+    return {
+        'outbreak_classifier': {'catboost': CATBOOST_PARAMS, 'random_forest': RF_PARAMS},
+        'cases_regressor': CASES_PARAMS,
+        'deaths_regressor': DEATHS_PARAMS,
+    }
+
+
+def stage_params(path=BEST_PARAMS_FILE):
+    """Default hyperparameters, replaced per stage by tuned ones when available."""
+    params = default_params()
+    if os.path.exists(path):
+        with open(path) as f:
+            tuned = json.load(f)
+        for stage in params:
+            if stage in tuned.get('params', {}):
+                params[stage] = tuned['params'][stage]
+                print(f"🎛️ {stage}: using tuned parameters from {os.path.basename(path)}")
+    return params
+
+
+def run_stage(stage, df, params, threads):
+    """Worker entry point: fit one stage and report how long it took."""
+    started = time.perf_counter()
+    result = fit_stage(stage, df, params, threads)
+    return result, time.perf_counter() - started
+
+
+def train_stages(df, params, use_cache=True):
+    """Fit every stage, reusing cached results and training the rest in parallel processes."""
+    data_hash = frame_hash(df)
+    keys = {stage: stage_key(stage, data_hash, params[stage]) for stage in STAGE_MODELS}
+
+    results = {}
+    if use_cache:
+        for stage, key in keys.items():
+            cached = load_cached_stage(stage, key)
+            if cached is not None:
+                print(f"♻️ {stage}: reusing cached stage {key}")
+                results[stage] = cached
+
+    pending = [stage for stage in STAGE_MODELS if stage not in results]
+    if pending:
+        threads = max(1, TRAIN_THREADS // len(pending))
+        print(f"🚀 Training {', '.join(pending)} in {len(pending)} processes x {threads} threads")
+        # spawn, not fork: the boosting libraries' thread pools are not fork-safe
+        with ProcessPoolExecutor(max_workers=len(pending), mp_context=get_context('spawn')) as pool:
+            futures = {stage: pool.submit(run_stage, stage, df, params[stage], threads) for stage in pending}
+            for stage, future in futures.items():
+                results[stage], seconds = future.result()
+                print(f"⏱️ {stage} trained in {seconds:.1f}s")
+                save_cached_stage(stage, keys[stage], results[stage])
+
+    return results
+
+
+def update_outbreak_classifier(df_new, params, rounds, extra_trees, threads):
+    """Continue the CatBoost booster and grow the forest on new rows only."""
+    X, y = outbreak_xy(df_new)
+    if y.nunique() < 2 or len(X) < MIN_UPDATE_ROWS:
+        print(f"⚠️ outbreak_classifier: {len(X)} new rows with {y.nunique()} class(es); not updated")
+        return
+
+    ensemble = joblib.load('../models/combined_outbreak_model.pkl')
+    names = [name for name, _ in ensemble.estimators]
+
+    old_catboost = ensemble.named_estimators_['catboost']
+    catboost_clf = CatBoostClassifier(
+        **{**params['catboost'], 'iterations': rounds},
+        thread_count=threads,
+        class_weights=old_catboost.get_params().get('class_weights'),
+    )
+    catboost_clf.fit(X, y, init_model=old_catboost)
+    ensemble.estimators_[names.index('catboost')] = catboost_clf
+    ensemble.named_estimators_['catboost'] = catboost_clf
+
+    # 'balanced' would weight the new trees by this batch alone; use the full history's balance
+    history = load_processed_data(PROCESSED_CSV, PROCESSED_COLUMNS, columns=['Outbreak'])['Outbreak']
+    weights = compute_class_weight('balanced', classes=ensemble.classes_, y=history)
+    rf_clf = ensemble.named_estimators_['random_forest']
+    class_weight = rf_clf.class_weight
+    rf_clf.set_params(warm_start=True, n_estimators=rf_clf.n_estimators + extra_trees, n_jobs=threads,
+                      class_weight=dict(zip(ensemble.classes_.tolist(), weights)))
+    rf_clf.fit(X, y)
+    rf_clf.set_params(warm_start=False, n_jobs=None, class_weight=class_weight)
+
+    print(f"🔁 outbreak_classifier: +{rounds} CatBoost rounds "
+          f"({catboost_clf.tree_count_} trees), +{extra_trees} forest trees on {len(X)} rows")
+    joblib.dump(ensemble, '../models/combined_outbreak_model.pkl')
+    print("💾 Saved: combined_outbreak_model.pkl")
+    export_fast_ensemble(ensemble, X)
+
+
+def update_regressor(stage, df_new, params, rounds, threads, path):
+    """Add boosting rounds to an existing XGBoost regressor using new rows only."""
+    X, y = STAGE_MODELS[stage][0](df_new)
+    if len(X) < MIN_UPDATE_ROWS:
+        print(f"⚠️ {stage}: only {len(X)} new rows; not updated")
+        return
+
+    old = joblib.load(path)
+    model = XGBRegressor(**{**params, 'n_estimators': rounds}, n_jobs=threads)
+    model.fit(X, y, xgb_model=old.get_booster())
+    release_threads(model)
+
+    print(f"🔁 {stage}: +{rounds} rounds ({model.get_booster().num_boosted_rounds()} total) on {len(X)} rows")
+    joblib.dump(model, path)
+    print(f"✅ Saved: {os.path.basename(path)}")
+
+
+def update(increment_path=INCREMENT_CSV, rounds=UPDATE_ROUNDS, extra_trees=UPDATE_TREES):
+    """Warm-start every model from the saved ones using only the latest increment."""
+    print(f"🚀 Updating models from {increment_path}...")
+    df_new = pd.read_csv(increment_path)
+    params = stage_params()
+
+    update_outbreak_classifier(df_new, params['outbreak_classifier'], rounds, extra_trees, TRAIN_THREADS)
+    update_regressor('cases_regressor', df_new, params['cases_regressor'], rounds, TRAIN_THREADS,
+                     '../models/xgb_cases_model.pkl')
+    update_regressor('deaths_regressor', df_new, params['deaths_regressor'], rounds, TRAIN_THREADS,
+                     '../models/xgb_deaths_model.pkl')
+
+    print("\n✅ Models updated. Run `python evaluation.py` to refresh the outbreak thresholds.")
+
+
+def main(use_cache=True):
     print("🚀 Loading processed data and starting training...")
     df = load_data_and_features()
     os.makedirs('../models', exist_ok=True)
 
-    train_outbreak_classifier(df)
-    train_cases_regressor(df)
-    train_deaths_regressor(df)
+    results = train_stages(df, stage_params(), use_cache=use_cache)
+    for stage, report in STAGE_REPORTS.items():
+        report(results[stage])
 
     print("\n✅ All models trained and saved successfully!")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train or tune the outbreak, cases and deaths models.")
+    commands = parser.add_subparsers(dest='command')
+
+    train_parser = commands.add_parser('train', help="Train and save all models (default)")
+    train_parser.add_argument('--no-cache', action='store_true', help="Retrain every stage")
+
+    update_parser = commands.add_parser('update', help="Warm-start the saved models on the latest increment")
+    update_parser.add_argument('--increment', default=INCREMENT_CSV)
+    update_parser.add_argument('--rounds', type=int, default=UPDATE_ROUNDS)
+    update_parser.add_argument('--trees', type=int, default=UPDATE_TREES)
+
+    tune_parser = commands.add_parser('tune', help="Search hyperparameters and write best_params.json")
+    tune_parser.add_argument('--stages', nargs='+', choices=list(STAGE_MODELS), default=list(STAGE_MODELS))
+    tune_parser.add_argument('--trials', type=int, default=27, help="Configurations sampled per stage")
+    tune_parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta at each halving rung")
+    tune_parser.add_argument('--latency-weight', type=float, default=0.01,
+                             help="Score lost per ms of 3-row prediction latency")
+    tune_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    tune_parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == 'update':
+        update(args.increment, rounds=args.rounds, extra_trees=args.trees)
+    elif args.command == 'tune':
+        from tuning import tune
+        tune(args.stages, trials=args.trials, eta=args.eta, latency_weight=args.latency_weight,
+             workers=args.workers, seed=args.seed)
+    else:
+        main(use_cache=not getattr(args, 'no_cache', False))
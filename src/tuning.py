@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from ensemble_export import flatten_ensemble
+from evaluation import threshold_curve
+from train_model import (
+    BEST_PARAMS_FILE, PROCESSED_COLUMNS, PROCESSED_CSV, STAGE_MODELS, TRAIN_THREADS,
+    release_threads, split_stage, stage_params,
+)
+from app.columnar import load_processed_data
+from app.fast_ensemble import FastEnsemble
+
+# Candidate values per hyperparameter; unlisted parameters keep their current values
+SEARCH_SPACES = {
+    'outbreak_classifier': {
+        'catboost': {'iterations': [100, 200, 300, 400], 'depth': [4, 5, 6, 8],
+                     'learning_rate': [0.03, 0.05, 0.1]},
+        'random_forest': {'n_estimators': [25, 50, 100, 150], 'max_depth': [6, 8, 10, 14],
+                          'min_samples_leaf': [1, 2, 5]},
+    },
+    'cases_regressor': {'max_depth': [3, 4, 5, 7], 'n_estimators': [50, 100, 150, 300],
+                        'learning_rate': [0.03, 0.05, 0.1, 0.2]},
+    'deaths_regressor': {'max_depth': [3, 4, 6], 'n_estimators': [50, 100, 200],
+                         'learning_rate': [0.05, 0.1, 0.3], 'min_child_weight': [1, 5]},
+}
+
+# Smallest share of the training rows a first-rung trial is fitted on
+MIN_FRACTION = 1 / 9
+# Rows per latency probe: /predict scores three diseases per location
+LATENCY_ROWS = 3
+LATENCY_REPEATS = 15
+
+
+def sample_config(space, base, rng):
+    """One random configuration from `space`, layered over the `base` parameters."""
+    config = dict(base)
+    for name, options in space.items():
+        if isinstance(options, dict):
+            config[name] = sample_config(options, base.get(name, {}), rng)
+        else:
+            value = options[rng.integers(len(options))]
+            config[name] = value.item() if isinstance(value, np.generic) else value
+    return config
+
+
+def sample_configs(stage, base, trials, rng):
+    """`trials` distinct configurations, starting with the current one as the baseline."""
+    configs = {json.dumps(base, sort_keys=True): base}
+    attempts = 0
+    while len(configs) < trials and attempts < trials * 20:
+        config = sample_config(SEARCH_SPACES[stage], base, rng)
+        configs.setdefault(json.dumps(config, sort_keys=True), config)
+        attempts += 1
+    return list(configs.values())
+
+
+def serving_predict(model, X, classifier):
+    """The predict call the API would make for this model, on X's columns.
+
+    The API serves the classifier as the exported FastEnsemble and calls the
+    XGBoost regressors directly, both on assembled float32 arrays.
+    """
+    if classifier:
+        return FastEnsemble(flatten_ensemble(model, X.columns)).predict_proba
+    return model.predict
+
+
+def prediction_latency_ms(model, X, classifier):
+    predict = serving_predict(model, X, classifier)
+    rows = X.iloc[:LATENCY_ROWS].to_numpy(dtype=np.float32)
+    predict(rows)  # warm-up
+    times = []
+    for _ in range(LATENCY_REPEATS):
+        started = time.perf_counter()
+        predict(rows)
+        times.append(time.perf_counter() - started)
+    return 1000 * float(np.median(times))
+
+
+def run_trial(stage, params, X_train, y_train, X_val, y_val, fraction, threads):
+    """Worker entry point: fit one configuration on a prefix of the (shuffled) training rows."""
+    n = max(50, int(len(X_train) * fraction))
+    X_fit, y_fit = X_train.iloc[:n], y_train.iloc[:n]
+    classifier = stage == 'outbreak_classifier'
+
+    started = time.perf_counter()
+    model = STAGE_MODELS[stage][1](params, threads, y_fit)
+    model.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - started
+    release_threads(model)
+
+    if classifier:
+        quality = float(threshold_curve(y_val, model.predict_proba(X_val)[:, 1])['f1'].max())
+    else:
+        quality = float(r2_score(y_val, model.predict(X_val)))
+    return {
+        'quality': quality,
+        'latency_ms': prediction_latency_ms(model, X_val, classifier),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def halving_rungs(trials, eta):
+    """Training-data fractions per rung, ending at the full training set."""
+    rungs = 1
+    while eta ** rungs <= trials and eta ** -rungs >= MIN_FRACTION:
+        rungs += 1
+    return [eta ** -(rungs - 1 - i) for i in range(rungs)]
+
+
+def successive_halving(stage, configs, data, eta, latency_weight, pool, threads):
+    """Evaluate every config on a small slice, keep the best 1/eta, grow the slice, repeat."""
+    X_train, y_train, X_val, y_val = data
+    survivors = list(range(len(configs)))
+    results = {}
+    history = []
+
+    for fraction in halving_rungs(len(configs), eta):
+        futures = {
+            i: pool.submit(run_trial, stage, configs[i], X_train, y_train, X_val, y_val, fraction, threads)
+            for i in survivors
+        }
+        for i, future in futures.items():
+            result = future.result()
+            result['objective'] = result['quality'] - latency_weight * result['latency_ms']
+            results[i] = result
+
+        survivors.sort(key=lambda i: results[i]['objective'], reverse=True)
+        best = results[survivors[0]]
+        print(f"   rung {fraction:.2f} of train: {len(survivors)} configs | best objective "
+              f"{best['objective']:.4f} (quality {best['quality']:.4f}, {best['latency_ms']:.2f} ms)")
+        history.append({'fraction': fraction, 'configs': len(survivors), 'best': dict(best)})
+        if fraction < 1:
+            survivors = survivors[:max(1, len(survivors) // eta)]
+
+    best = survivors[0]
+    return configs[best], results[best], history
+
+
+def tuning_data(stage, df):
+    """Training rows split again into fit/validation; the held-out test split stays untouched."""
+    X, y = STAGE_MODELS[stage][0](df)
+    X_train, _, y_train, _ = split_stage(stage, X, y)
+    stratify = y_train if stage == 'outbreak_classifier' else None
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.25, random_state=42, stratify=stratify
+    )
+    return X_fit, y_fit, X_val, y_val
+
+
+def tune(stages, trials=27, eta=3, latency_weight=0.01, workers=None, seed=42, path=BEST_PARAMS_FILE):
+    """Search each stage's hyperparameters and merge the winners into `path`."""
+    df = load_processed_data(PROCESSED_CSV, PROCESSED_COLUMNS, mmap=False)
+    current = stage_params(path)
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, TRAIN_THREADS // workers)
+    rng = np.random.default_rng(seed)
+
+    best_params = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            best_params = json.load(f)
+    best_params.setdefault('params', {})
+    best_params.setdefault('search', {})
+
+    # spawn, not fork: the boosting libraries' thread pools are not fork-safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        for stage in stages:
+            configs = sample_configs(stage, current[stage], trials, rng)
+            print(f"\n🎛️ Tuning {stage}: {len(configs)} configs, eta={eta}, {workers} workers x {threads} threads")
+            started = time.perf_counter()
+            params, result, history = successive_halving(
+                stage, configs, tuning_data(stage, df), eta, latency_weight, pool, threads
+            )
+            print(f"🏆 {stage}: objective {result['objective']:.4f} | quality {result['quality']:.4f} "
+                  f"| {result['latency_ms']:.2f} ms | {time.perf_counter() - started:.1f}s")
+            print(f"   {json.dumps(params, sort_keys=True)}")
+
+            best_params['params'][stage] = params
+            best_params['search'][stage] = {
+                'quality_metric': 'f1' if stage == 'outbreak_classifier' else 'r2',
+                'result': result,
+                'rungs': history,
+                'trials': len(configs),
+                'eta': eta,
+                'latency_weight': latency_weight,
+                'seed': seed,
+            }
+
+    with open(path, 'w') as f:
+        json.dump(best_params, f, indent=2)
+    print(f"\n💾 Saved: {os.path.basename(path)} (used by the next `python train_model.py`)")
+    return best_params
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# The app reads models/ and data/ relative to the repository root
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+# Must be set before app.main is imported: no writes to the real stores, no background work
+SCRATCH = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("MODEL_LOAD_MODE", "lazy")
+os.environ["AREA_STORE_PATH"] = os.path.join(SCRATCH, "district_area.sqlite3")
+os.environ["SNAPSHOT_STORE_PATH"] = os.path.join(SCRATCH, "snapshots.sqlite3")
+os.environ["SNAPSHOT_INTERVAL"] = "0"
+os.environ.pop("PREDICTION_CACHE_PATH", None)
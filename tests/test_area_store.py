@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.area_store import AreaStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AreaStore(str(tmp_path / "area.sqlite3"), negative_ttl=3600)
+
+
+def test_negative_never_replaces_positive(store):
+    store.put("kerala_kollam", 2491.0)
+    store.put_negative("kerala_kollam")
+    assert store.get("kerala_kollam") == 2491.0
+
+
+def test_negative_expires_after_its_ttl(store):
+    store.put_negative("x_y", ttl=-1)
+    assert store.get("x_y") is None
+    store.put_negative("x_y")
+    assert store.get("x_y") == 0.0
+
+
+def test_upstream_error_is_remembered_briefly(monkeypatch, store):
+    calls = []
+
+    async def unavailable(url, params=None, timeout=10.0):
+        calls.append(url)
+        raise RuntimeError("geoapify down")
+
+    monkeypatch.setattr(main, "get_json", unavailable)
+    monkeypatch.setattr(main, "AREA_STORE", store)
+
+    for _ in range(3):
+        assert asyncio.run(main.get_district_area("Kerala", "Nowhere", 9.0, 76.0)) == 0.0
+    assert len(calls) == 1
+
+    # A forced refresh during the outage keeps a known area
+    store.put("kerala_kollam", 2491.0)
+    asyncio.run(main.get_district_area("Kerala", "Kollam", 9.0, 76.0, force_refresh=True))
+    assert store.get("kerala_kollam") == 2491.0
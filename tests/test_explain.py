@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.model_utils import get_lat_long
+
+
+def test_explain_assembles_features_once(monkeypatch):
+    async def unavailable(state, district):
+        raise RuntimeError("weatherstack down")
+
+    monkeypatch.setattr(main, "fetch_weather", unavailable)
+    main.WEATHER_CACHE.clear()
+    weather = asyncio.run(main.get_weather("Maharashtra", "Pune"))
+    main.WEATHER_CACHE.clear()
+    lat, lon = get_lat_long("Maharashtra", "Pune")
+    loc = {"LAI": 1.0, "Population": 1000.0, "Area_km2": 100.0, "Population_Density": 10.0,
+           "Sanitation_Index": 0.0, "Latitude": lat, "Longitude": lon}
+
+    async def context(location):
+        return location, weather, loc
+
+    assembled = []
+
+    def assemble(rows):
+        assembled.append(len(rows))
+        return original(rows)
+
+    original = main.assemble_features
+    monkeypatch.setattr(main, "gather_location_context", context)
+    monkeypatch.setattr(main, "assemble_features", assemble)
+
+    response = TestClient(main.app).post("/explain", json={"state_ut": "Maharashtra", "district": "Pune"})
+
+    assert response.status_code == 200
+    assert assembled == [len(main.DISEASES)]
+    for prediction in response.json()["predictions"]:
+        explanation = prediction["explanation"]["outbreak"]
+        total = explanation["base_value"] + sum(f["contribution"] for f in explanation["factors"])
+        assert abs(total - prediction["probability"]) < 1e-6
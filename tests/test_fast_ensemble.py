@@ -0,0 +1,23 @@
+import numpy as np
+
+from app.fast_ensemble import BatchDispatchModel, FastEnsemble
+from app.feature_assembler import NamedFeatureModel
+from app.model_registry import FAST_ENSEMBLE_FILE, registry
+
+
+def test_dispatch_sends_large_batches_to_pickle():
+    fast = FastEnsemble.load(FAST_ENSEMBLE_FILE)
+    loads = []
+
+    def load_large():
+        loads.append(1)
+        return NamedFeatureModel(registry.get("combined_ensemble"), fast.feature_names)
+
+    model = BatchDispatchModel(fast, load_large, max_rows=4)
+    X = np.random.default_rng(0).uniform(0, 300, size=(8, len(fast.feature_names))).astype(np.float32)
+
+    small = model.predict_proba(X[:4])
+    assert not loads
+    large = model.predict_proba(X)
+    assert loads == [1]
+    np.testing.assert_allclose(large[:4], small, atol=1e-6)
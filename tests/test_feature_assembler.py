@@ -0,0 +1,32 @@
+from app.feature_assembler import FeatureAssembler
+from app.label_resolver import LabelResolver
+
+FEATURES = ["week_of_outbreak", "state_ut", "district", "Disease", "Temp"]
+
+
+def make_assembler():
+    resolvers = {
+        "state_ut": LabelResolver(["Kerala", "Maharashtra"]),
+        "district": LabelResolver(["Kollam", "Pune"]),
+        "Disease": LabelResolver(["Cholera", "Dengue"]),
+        "week_of_outbreak": LabelResolver([f"{w}th week" for w in range(4, 21)]),
+    }
+    return FeatureAssembler(FEATURES, resolvers)
+
+
+def test_label_codes_cache_is_bounded():
+    assembler = make_assembler()
+    maxsize = assembler.encode.cache_parameters()["maxsize"]
+    assert maxsize is not None
+    for i in range(maxsize + 500):
+        assembler.encode("district", f"fuzz-{i}")
+    assert assembler.encode.cache_info().currsize == maxsize
+
+
+def test_assemble_resolves_labels_and_aliases():
+    assembler = make_assembler()
+    X = assembler.assemble([
+        {"state_ut": "maharashtra", "district": "Pune", "Disease": "Dengue", "week_of_outbreak": 5,
+         "temperature": 25.0},
+    ])
+    assert X[0].tolist() == [1.0, 1.0, 1.0, 1.0, 298.1499938964844]
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from app import main
+from app.area_store import AreaStore
+from app.geo import geod_area_km2
+from app.precompute_areas import precompute
+
+
+def square(lon, lat, size, clockwise=False):
+    ring = [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+    return ring[::-1] if clockwise else ring
+
+
+def district_feature(shell, hole):
+    return {
+        "type": "Feature",
+        "properties": {"admin_level": 5},
+        "geometry": {"type": "Polygon", "coordinates": [shell, hole]},
+    }
+
+
+def test_ring_orientation_does_not_change_area():
+    wound = {"type": "Polygon", "coordinates": [square(76, 9, 1), square(76.2, 9.2, 0.5, clockwise=True)]}
+    # Hole wound the same way as the shell, and the shell clockwise
+    miswound = {"type": "Polygon", "coordinates": [square(76, 9, 1, clockwise=True), square(76.2, 9.2, 0.5)]}
+    shell_only = {"type": "Polygon", "coordinates": [square(76, 9, 1)]}
+
+    assert geod_area_km2([miswound]) == pytest.approx(geod_area_km2([wound]), rel=1e-12)
+    assert geod_area_km2([wound]) == pytest.approx(0.75 * geod_area_km2([shell_only]), rel=1e-3)
+
+
+def test_live_and_precomputed_areas_match(monkeypatch, tmp_path):
+    features = [district_feature(square(76, 9, 1), square(76.2, 9.2, 0.5))]
+    with open(tmp_path / "kerala_kollam.geojson", "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    precomputed = AreaStore(str(tmp_path / "precomputed.sqlite3"))
+    precompute([("Kerala", "Kollam", 9.0, 76.0)], precomputed, geojson_dir=str(tmp_path))
+
+    async def geoapify(url, params=None, timeout=10.0):
+        return {"features": features}
+
+    live = AreaStore(str(tmp_path / "live.sqlite3"))
+    monkeypatch.setattr(main, "get_json", geoapify)
+    monkeypatch.setattr(main, "AREA_STORE", live)
+    area = asyncio.run(main.get_district_area("Kerala", "Kollam", 9.0, 76.0))
+
+    assert area > 0
+    assert live.get("kerala_kollam") == precomputed.get("kerala_kollam") == area
@@ -0,0 +1,45 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from app.columnar import read_schema
+from src.data_preprocessing import preprocess_increment
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    paths = {
+        "processed_csv": str(tmp_path / "processed_data.csv"),
+        "columnar_path": str(tmp_path / "processed_columns"),
+        "increment_path": str(tmp_path / "increment.csv"),
+        "encoders_path": str(tmp_path / "label_encoders.pkl"),
+    }
+    # copy2 keeps mtimes, so the columnar copy stays current relative to the CSV
+    shutil.copy2("data/processed_data.csv", paths["processed_csv"])
+    shutil.copytree("data/processed_columns", paths["columnar_path"])
+    shutil.copy("models/label_encoders.pkl", paths["encoders_path"])
+    return paths
+
+
+def test_same_week_is_not_appended_twice(artifacts, tmp_path):
+    week = pd.read_csv("data/Final_data.csv", index_col=0, nrows=20)
+    week_path = tmp_path / "week.csv"
+    week.to_csv(week_path)
+
+    encoded, _ = preprocess_increment(str(week_path), **artifacts)
+    (entry,) = read_schema(artifacts["columnar_path"])["ingested"]
+    assert entry["source"] == "week.csv" and entry["rows"] == len(encoded) == 20
+    rows = len(pd.read_csv(artifacts["processed_csv"]))
+
+    with pytest.raises(ValueError, match="already appended"):
+        preprocess_increment(str(week_path), **artifacts)
+
+    # Same rows re-exported in another order
+    shuffled_path = tmp_path / "week_again.csv"
+    week.iloc[::-1].to_csv(shuffled_path)
+    with pytest.raises(ValueError, match="same rows"):
+        preprocess_increment(str(shuffled_path), **artifacts)
+
+    assert len(pd.read_csv(artifacts["processed_csv"])) == rows
+    assert len(read_schema(artifacts["columnar_path"])["ingested"]) == 1
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app import main
+from app.model_utils import assemble_features, get_lat_long
+
+
+@pytest.fixture
+def fallback_weather(monkeypatch):
+    async def unavailable(state, district):
+        raise RuntimeError("weatherstack down")
+
+    monkeypatch.setattr(main, "fetch_weather", unavailable)
+    main.WEATHER_CACHE.clear()
+    weather = asyncio.run(main.get_weather("Maharashtra", "Pune"))
+    main.WEATHER_CACHE.clear()
+    return weather
+
+
+def location_features(lat, lon):
+    return {
+        "LAI": 1.0, "Population": 1000.0, "Area_km2": 100.0, "Population_Density": 10.0,
+        "Sanitation_Index": 0.0, "Latitude": lat, "Longitude": lon,
+    }
+
+
+def feature_values(rows, *names):
+    order = [str(f) for f in main.registry.get("feature_order")]
+    X = assemble_features(rows)
+    return [X[:, order.index(name)] for name in names]
+
+
+def test_fallback_rows_use_location_coordinates(fallback_weather):
+    assert fallback_weather["fallback"]
+    assert fallback_weather["latitude"] == 0.0 and fallback_weather["longitude"] == 0.0
+
+    lat, lon = get_lat_long("Maharashtra", "Pune")
+    loc = location_features(lat, lon)
+    rows = [
+        main.build_input_row("Maharashtra", "Pune", disease, fallback_weather, loc, datetime(2024, 7, 1))
+        for disease in main.DISEASES
+    ]
+
+    latitude, longitude = feature_values(rows, "Latitude", "Longitude")
+    assert latitude == pytest.approx(lat, abs=1e-4)
+    assert longitude == pytest.approx(lon, abs=1e-4)
+    assert 18 < lat < 19 and 73 < lon < 74
+
+    result = main.build_result("Dengue", False, 0.1, fallback_weather, loc)
+    assert (result["Latitude"], result["Longitude"]) == (lat, lon)
+    assert result["Weather_Fallback"] is True
+
+
+def test_fallback_rows_score_seasonal_normals(fallback_weather):
+    loc = location_features(*get_lat_long("Maharashtra", "Pune"))
+    row = main.build_input_row("Maharashtra", "Pune", "Dengue", fallback_weather, loc, datetime(2024, 7, 1))
+
+    (temp,) = feature_values([row], "Temp")
+    # Seasonal Kelvin normals, not the 0 °C placeholder converted to 273.15 K
+    assert temp[0] > 280
+
+
+def test_live_rows_keep_weatherstack_coordinates(fallback_weather):
+    live = {**fallback_weather, "fallback": False, "latitude": 18.5, "longitude": 73.9,
+            "temperature": 25.0, "precip": 1.0}
+    loc = location_features(0.0, 0.0)
+    row = main.build_input_row("Maharashtra", "Pune", "Dengue", live, loc, datetime(2024, 7, 1))
+    assert (row["Latitude"], row["Longitude"]) == (18.5, 73.9)